@@ -1,12 +1,18 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from dotenv import load_dotenv
 import inspect
 
 # ✅ Import ALL existing route files
 from routes import github, pull_request, health, federation, replication, orchestration
 from services.federation_service import FederationService
+from services.github_client import get_github_client
+from services.parsing_engine import get_parsing_engine
+from services.db.repo_manager import AsyncRepoManager
+from services.db.migrations import MigrationRunner, auto_migrate_enabled
+from settings import get_database, get_async_database, get_read_database, get_async_read_database
 
 # ✅ Load .env credentials
 load_dotenv()
@@ -38,11 +44,33 @@ async def global_exception_handler(request: Request, exc: Exception):
         content={"error": str(exc), "detail": "Internal Kernel Failure"}
     )
 @app.on_event("startup")
+async def apply_migrations():
+    if auto_migrate_enabled():
+        await run_in_threadpool(MigrationRunner().upgrade)
+@app.on_event("startup")
+async def open_async_pool():
+    await get_async_database().open()
+@app.on_event("startup")
+async def warm_repo_identity_cache():
+    try:
+        warmed = await AsyncRepoManager().warm_cache()
+        print(f"✅ Repo identity cache warmed with {warmed} repos")
+    except Exception as e:
+        print(f"⚠️ Repo identity cache warm-up skipped: {e}")
+@app.on_event("startup")
 async def print_routes():
     print("\n🔍 REGISTERED ROUTES:")
     for route in app.routes:
         if hasattr(route, "path"):
             print(f"{route.methods} -> {route.path}")
+@app.on_event("shutdown")
+async def close_shared_pools():
+    get_github_client().close()
+    get_parsing_engine().close()
+    get_read_database().close_all()
+    get_database().close_all()
+    await get_async_read_database().close_all()
+    await get_async_database().close_all()
 # ✅ Request Logger for audit tracking
 @app.middleware("http")
 async def request_logger(request: Request, call_next):
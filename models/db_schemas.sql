@@ -1,6 +1,8 @@
+-- Reference DDL; the live schema is managed by services/db/migrations.py
+-- (python -m services.db.migrations upgrade), which also creates the indexes.
 CREATE TABLE IF NOT EXISTS federation_repo (
     id SERIAL PRIMARY KEY,
-    repo_id INTEGER UNIQUE,  -- Changed to INTEGER
+    repo_id TEXT UNIQUE,  -- logical "owner/repo" id
     branch TEXT,
     root_sha TEXT,
     ingestion_date TIMESTAMP DEFAULT NOW()
@@ -16,9 +18,23 @@ CREATE TABLE IF NOT EXISTS semantic_node (
     docstring TEXT,
     methods JSONB,
     inherits_from TEXT,
+    qualname TEXT,  -- dotted path within the file, e.g. Class.method
+    lineno INTEGER,
+    end_lineno INTEGER,
+    decorators JSONB,
+    is_async BOOLEAN DEFAULT FALSE,
+    calls JSONB,  -- call targets made from a function / method body
     parsed_date TIMESTAMP DEFAULT NOW()
 );
 
+CREATE TABLE IF NOT EXISTS semantic_file (
+    repo_id INTEGER REFERENCES federation_repo(id),
+    file_path TEXT,
+    blob_sha TEXT,  -- blob the file's semantic_node rows were parsed from
+    analyzed_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (repo_id, file_path)
+);
+
 CREATE TABLE IF NOT EXISTS patch_proposal (
     proposal_id UUID PRIMARY KEY,
     repo_id INTEGER REFERENCES federation_repo(id),  -- Changed to INTEGER for foreign key reference
@@ -41,3 +57,19 @@ CREATE TABLE IF NOT EXISTS federation_graph (
     notes TEXT,
     created_at TIMESTAMP DEFAULT NOW()
 );
+
+CREATE TABLE IF NOT EXISTS federation_edge (
+    repo_id INTEGER REFERENCES federation_repo(id),
+    source_path TEXT,
+    source_name TEXT,  -- qualname of the importing / calling definition, '' for module-level imports
+    target_path TEXT,
+    target_name TEXT,  -- '' when the whole module is imported
+    edge_type TEXT,  -- import | call | inherits
+    PRIMARY KEY (repo_id, source_path, source_name, edge_type, target_path, target_name)
+);
+
+CREATE TABLE IF NOT EXISTS federation_edge_state (
+    repo_id INTEGER PRIMARY KEY REFERENCES federation_repo(id),
+    edge_count INTEGER,
+    built_at TIMESTAMP DEFAULT NOW()
+);
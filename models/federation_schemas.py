@@ -8,6 +8,7 @@ class ImportRepoRequest(BaseModel):
 
 class AnalyzeRepoRequest(BaseModel):
     repo_id: int  # 🔧 integer PK now
+    ingest_mode: str = "tree"  # "tree" = per-file blob reads, "archive" = one tarball download
 
 class PatchObject(BaseModel):
     file_path: str
@@ -31,4 +31,5 @@ class ReplicationExecutionRequest(BaseModel):
     target_repo_id: int
     commit_message: str
     target_branch: str
+    seeds: Optional[List[str]] = None  # replicate only the dependency closure of these files / modules
     
\ No newline at end of file
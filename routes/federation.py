@@ -1,5 +1,11 @@
 from fastapi import APIRouter, HTTPException, Query
+import json
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Optional
 from services.federation_service import FederationService
+from services.db.repo_manager import AsyncRepoManager
+from services.db.federation_graph_manager import AsyncFederationGraphManager
 from models.federation_schemas import (
     ImportRepoRequest, AnalyzeRepoRequest, CommitPatchRequest, ProposePatchRequest, ApprovePatchRequest, LinkFederationNodeRequest
 )
@@ -7,11 +13,13 @@ from models.federation_schemas import (
 
 router = APIRouter(prefix="/federation")
 service = FederationService()
+async_repo_manager = AsyncRepoManager()
+async_graph_manager = AsyncFederationGraphManager()
 
 @router.post("/import-repo")
 async def import_repo(payload: ImportRepoRequest):
     try:
-        result = service.import_repo(payload)
+        result = await run_in_threadpool(service.import_repo, payload)
         return {"status": "repo_imported", "data": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -19,7 +27,7 @@ async def import_repo(payload: ImportRepoRequest):
 @router.post("/analyze-repo")
 async def analyze_repo(payload: AnalyzeRepoRequest):
     try:
-        result = service.analyze_repo(payload)  # ✅ pass full Pydantic object
+        result = await run_in_threadpool(service.analyze_repo, payload)  # ✅ pass full Pydantic object
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -30,7 +38,7 @@ async def analyze_repo(payload: AnalyzeRepoRequest):
 @router.post("/propose-patch")
 async def propose_patch(payload: ProposePatchRequest):
     try:
-        result = service.propose_patch(payload)
+        result = await service.propose_patch_async(payload)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -38,7 +46,7 @@ async def propose_patch(payload: ProposePatchRequest):
 @router.post("/commit-patch")
 async def commit_patch(payload: CommitPatchRequest):
     try:
-        result = service.commit_patch(payload)
+        result = await run_in_threadpool(service.commit_patch, payload)
         return {"status": "patch_committed", "data": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -84,29 +92,18 @@ async def link_federation_node(payload: LinkFederationNodeRequest):
             pass
 
         # Resolve logical repo_id (string) from PK to match GraphManager contract
-        logical_repo_id = service.repo_manager.resolve_repo_id_by_pk(int(payload.repo_id))
-
-        conn = service.db.get_connection()
-        try:
-            with conn.cursor() as cur:
-                # ✅ Perform INSERT or update logic here
-                service.graph_manager.insert_graph_link(
-                logical_repo_id,
-                payload.file_path,
-                "file",
-                payload.name,
-                payload.cross_linked_to or "",
-                1.0,
-                payload.notes or ""
-            )
-
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            service.db.release_connection(conn)
-
+        logical_repo_id = await async_repo_manager.resolve_repo_id_by_pk(int(payload.repo_id))
+
+        # ✅ Perform INSERT or update logic here
+        await async_graph_manager.insert_graph_link(
+            logical_repo_id,
+            payload.file_path,
+            "file",
+            payload.name,
+            payload.cross_linked_to or "",
+            1.0,
+            payload.notes or ""
+        )
 
         return {"status": "success"}
 
@@ -115,17 +112,70 @@ async def link_federation_node(payload: LinkFederationNodeRequest):
 
 
 
+def _split_columns(columns):
+    return [column.strip() for column in columns.split(",") if column.strip()] if columns else None
+
+
 @router.get("/graph/query")
-async def query_federation_graph(repo_id: int = Query(...)):
+async def query_federation_graph(
+    repo_id: int = Query(...),
+    after_id: Optional[int] = Query(None),
+    limit: int = Query(1000, ge=1, le=10000),
+    columns: Optional[str] = Query(None, description="Comma-separated column list"),
+    node_type: Optional[str] = Query(None),
+    path_prefix: Optional[str] = Query(None)
+):
 
     try:
-        logical_repo_id = service.repo_manager.resolve_repo_id_by_pk(repo_id)
-        graph_nodes = service.graph_manager.query_graph(logical_repo_id)
+        page = await async_graph_manager.query_graph_page(
+            repo_id, limit=limit, after_id=after_id, columns=_split_columns(columns),
+            node_type=node_type, path_prefix=path_prefix
+        )
 
         return {
             "status": "success",
             "repo_id": repo_id,
-            "nodes": graph_nodes
+            "nodes": page["nodes"],
+            "next_after_id": page["next_after_id"]
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/graph/query/stream")
+async def stream_federation_graph(
+    repo_id: int = Query(...),
+    columns: Optional[str] = Query(None, description="Comma-separated column list"),
+    node_type: Optional[str] = Query(None),
+    path_prefix: Optional[str] = Query(None)
+):
+    """
+    Streams the whole graph as NDJSON (one node per line) in constant memory.
+    """
+    rows = async_graph_manager.iter_graph(
+        repo_id, columns=_split_columns(columns), node_type=node_type, path_prefix=path_prefix
+    )
+
+    try:
+        first = await rows.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+    async def ndjson():
+        if first is None:
+            return
+        try:
+            yield json.dumps(first, default=str) + "\n"
+            async for row in rows:
+                yield json.dumps(row, default=str) + "\n"
+        finally:
+            # Releases the pooled connection even if the client disconnects mid-stream
+            await rows.aclose()
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException
-from services.db.federation_graph_manager import FederationGraphManager
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from services.db.federation_graph_manager import AsyncFederationGraphManager
 from models.federation_schemas import FederationGraphLinkRequest
 
 router = APIRouter(prefix="/federation/graph")
 
-manager = FederationGraphManager()
+manager = AsyncFederationGraphManager()
 
 @router.post("/link")
 async def insert_link(payload: FederationGraphLinkRequest):
@@ -13,7 +14,7 @@ async def insert_link(payload: FederationGraphLinkRequest):
         print("🔁 federation_graph.route.insert_link called")
         sys.stdout.flush()
 
-        manager.insert_graph_link(
+        await manager.insert_graph_link(
             repo_id=payload.repo_id,
             file_path=payload.file_path,
             node_type=payload.node_type,
@@ -32,9 +33,11 @@ async def insert_link(payload: FederationGraphLinkRequest):
 
 
 @router.get("/query")
-async def query_graph(repo_id: int = None):
+async def query_graph(repo_id: int = None, after_id: Optional[int] = None, limit: int = Query(1000, ge=1, le=10000),
+                      node_type: Optional[str] = None, path_prefix: Optional[str] = None):
     try:
-        graph = manager.query_graph(repo_id)
-        return graph
+        # One keyset page; pass next_after_id back as after_id until it comes back null
+        page = await manager.query_graph_page(repo_id, limit=limit, after_id=after_id, node_type=node_type, path_prefix=path_prefix)
+        return {"items": page["nodes"], "next_after_id": page["next_after_id"]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from services.github_service import GitHubService
 from models.schemas import BranchCreateRequest
 import urllib.parse
@@ -12,7 +13,7 @@ github_service = GitHubService()
 @router.get("/tree")
 async def get_repo_tree(branch: str = "main", recursive: bool = True):
     try:
-        result = github_service.get_repo_tree(branch, recursive)
+        result = await run_in_threadpool(github_service.get_repo_tree, branch, recursive)
         return result
     except Exception as e:
         print(f"[ERROR] get_repo_tree failed: {str(e)}")
@@ -23,7 +24,7 @@ async def get_repo_tree(branch: str = "main", recursive: bool = True):
 async def get_file_content(file_path: str, branch: str = "main"):
     try:
         encoded_path = urllib.parse.quote(file_path, safe="")
-        result = github_service.get_file(file_path, branch)
+        result = await run_in_threadpool(github_service.get_file, file_path, branch)
         return result
     except Exception as e:
         print(f"[ERROR] get_file_content failed: {str(e)}")
@@ -33,7 +34,7 @@ async def get_file_content(file_path: str, branch: str = "main"):
 @router.get("/history")
 async def get_file_history(file_path: str, branch: str = "main"):
     try:
-        result = github_service.get_file_history(file_path, branch)
+        result = await run_in_threadpool(github_service.get_file_history, file_path, branch)
         return result
     except Exception as e:
         print(f"[ERROR] get_file_history failed: {str(e)}")
@@ -43,7 +44,7 @@ async def get_file_history(file_path: str, branch: str = "main"):
 @router.get("/sha")
 async def get_branch_sha(branch: str = "main"):
     try:
-        result = github_service.get_branch_sha(branch)
+        result = await run_in_threadpool(github_service.get_branch_sha, branch)
         return result
     except Exception as e:
         print(f"[ERROR] get_branch_sha failed: {str(e)}")
@@ -53,7 +54,7 @@ async def get_branch_sha(branch: str = "main"):
 @router.post("/branch")
 async def create_branch(payload: BranchCreateRequest):
     try:
-        result = github_service.create_branch(payload.new_branch, payload.base_branch)
+        result = await run_in_threadpool(github_service.create_branch, payload.new_branch, payload.base_branch)
         return result
     except Exception as e:
         print(f"[ERROR] create_branch failed: {str(e)}")
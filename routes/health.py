@@ -1,4 +1,6 @@
 from fastapi import APIRouter, Request
+from settings import get_database, get_async_database, get_read_database, get_async_read_database
+from services.db.repo_manager import get_repo_identity_map
 import os
 
 router = APIRouter(prefix="/health")
@@ -11,3 +13,13 @@ async def health_check(request: Request):
         "repo_target": os.getenv("GITHUB_REPO"),
         "version": request.app.version  # ✅ dynamic from main.py
     }
+
+@router.get("/db")
+async def db_pool_metrics():
+    return {
+        "pool": get_database().metrics(),
+        "async_pool": get_async_database().metrics(),
+        "read_routing": get_read_database().metrics(),
+        "async_read_routing": get_async_read_database().metrics(),
+        "repo_cache": get_repo_identity_map().stats()
+    }
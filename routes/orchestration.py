@@ -1,9 +1,10 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from services.federation_service import FederationService
 from services.replicator.replication_plan_builder import ReplicationPlanBuilder
 from services.replicator.replication_executor import ReplicationExecutor
 from services.github_service import GitHubService
-from services.db.repo_manager import RepoManager
+from services.db.repo_manager import RepoManager, AsyncRepoManager
 from datetime import datetime
 from models.federation_schemas import AnalyzeRepoRequest, ReplicateSaaSRequest
 
@@ -37,31 +38,14 @@ class OrchestrationPipeline:
 
             # Step 2: Link semantic nodes into federation graph
             print("🔗 Linking semantic nodes...")
-            conn = self.federation.db.get_connection()
-            try:
-                with conn.cursor() as cur:
-                    cur.execute(
-                        "SELECT name, file_path FROM semantic_node WHERE repo_id = %s",
-                        (int(source_repo_id),)
-                    )
-                    nodes = cur.fetchall()
-                    for name, file_path in nodes:
-                        self.federation.graph_manager.insert_graph_link_tx(
-                            cur=cur,
-                            logical_repo_id=self.repo_manager.resolve_repo_id_by_pk(source_repo_id),
-                            file_path=file_path,
-                            node_type="file",
-                            name=name,
-                            cross_linked_to=None,
-                            federation_weight=1.0,
-                            notes="Auto-linked by orchestrator"
-                        )
-                conn.commit()
-            except Exception as e:
-                conn.rollback()
-                raise e
-            finally:
-                self.federation.db.release_connection(conn)
+            linked = self.federation.graph_manager.link_semantic_nodes(
+                int(source_repo_id),
+                node_type="file",
+                cross_linked_to=None,
+                federation_weight=1.0,
+                notes="Auto-linked by orchestrator"
+            )
+            print(f"🔗 Linked {linked} semantic nodes")
 
             # Step 3: Build replication plan
             print("🧠 Building replication plan...")
@@ -105,7 +89,7 @@ class OrchestrationPipeline:
 
 # ✅ Mounted orchestrator endpoint
 pipeline = OrchestrationPipeline()
-repo_manager = RepoManager()
+repo_manager = AsyncRepoManager()
 
 @router.post("/replicate-saas")
 async def replicate_saas(payload: ReplicateSaaSRequest):
@@ -114,10 +98,10 @@ async def replicate_saas(payload: ReplicateSaaSRequest):
         source_repo = payload.source_repo
         target_repo = payload.target_repo
 
-        source_pk = repo_manager.resolve_repo_pk(source_repo)
-        target_pk = repo_manager.resolve_repo_pk(target_repo)
+        source_pk = await repo_manager.resolve_repo_pk(source_repo)
+        target_pk = await repo_manager.resolve_repo_pk(target_repo)
 
-        result = pipeline.run_full_replication(source_pk, target_pk)
+        result = await run_in_threadpool(pipeline.run_full_replication, source_pk, target_pk)
         return result
 
     except Exception as e:
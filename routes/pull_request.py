@@ -1,13 +1,14 @@
 import os
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from services.github_service import GitHubService
-from services.db.repo_manager import RepoManager
+from services.db.repo_manager import AsyncRepoManager
 from models.schemas import PullRequestCreateRequest
 
 router = APIRouter(prefix="/repo")
 
 github_service = GitHubService()
-repo_manager = RepoManager()
+repo_manager = AsyncRepoManager()
 
 # 🧠 GPT-controlled Pull Request Creation with resolved repo_pk
 @router.post("/pull-request")
@@ -15,13 +16,14 @@ async def create_pull_request(payload: PullRequestCreateRequest):
     try:
         # 🧠 Hardcore known working repo PK for now
         repo_pk = 4
-        logical_repo_id = repo_manager.resolve_repo_id_by_pk(repo_pk)
+        logical_repo_id = await repo_manager.resolve_repo_id_by_pk(repo_pk)
         if not logical_repo_id or "/" not in logical_repo_id:
             raise ValueError(f"Invalid logical_repo_id: {logical_repo_id}")
 
         owner, repo = logical_repo_id.split("/")
 
-        result = github_service.create_pull_request(
+        result = await run_in_threadpool(
+            github_service.create_pull_request,
             owner=owner,
             repo=repo,
             source_branch=payload.source_branch,
@@ -1,27 +1,34 @@
 from fastapi import APIRouter, HTTPException, Body
+from fastapi.concurrency import run_in_threadpool
 from services.replicator.replication_plan_builder import ReplicationPlanBuilder
 from services.replicator.replication_executor import ReplicationExecutor
-from services.db.repo_manager import RepoManager
+from services.db.repo_manager import AsyncRepoManager
 from models.schemas import ReplicationExecutionRequest
 
 router = APIRouter(prefix="/replication")
 planner = ReplicationPlanBuilder()
 executor = ReplicationExecutor()
-repo_manager = RepoManager()
+repo_manager = AsyncRepoManager()
 
 @router.post("/plan")
 async def create_plan(payload: dict = Body(...)):
 
     try:
-        source_repo_id = repo_manager.resolve_repo_id_by_pk(int(payload["source_repo_id"]))
-        target_repo_id = repo_manager.resolve_repo_id_by_pk(int(payload["target_repo_id"]))
+        source_repo_id = await repo_manager.resolve_repo_id_by_pk(int(payload["source_repo_id"]))
+        target_repo_id = await repo_manager.resolve_repo_id_by_pk(int(payload["target_repo_id"]))
 
 
-        plan = planner.build_plan(
+        plan = await run_in_threadpool(
+            planner.build_plan,
             source_repo_id=source_repo_id,
-            target_repo_id=target_repo_id
+            target_repo_id=target_repo_id,
+            target_branch=payload.get("target_branch") or "main",
+            seeds=payload.get("seeds")
         )
         return plan
+    except ValueError as e:
+        # Unmatched seeds and malformed repo ids are the caller's to fix
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -34,17 +41,23 @@ async def execute_replication(payload: ReplicationExecutionRequest):
         source_repo_pk = int(payload.source_repo_id)
         target_repo_pk = int(payload.target_repo_id)
 
-        source_repo_id = repo_manager.resolve_repo_id_by_pk(source_repo_pk)
-        target_repo_id = repo_manager.resolve_repo_id_by_pk(target_repo_pk)
+        source_repo_id = await repo_manager.resolve_repo_id_by_pk(source_repo_pk)
+        target_repo_id = await repo_manager.resolve_repo_id_by_pk(target_repo_pk)
 
         print("[DEBUG] Resolved Source:", source_repo_id)
         print("[DEBUG] Resolved Target:", target_repo_id)
 
-        # Build plan
-        plan = planner.build_plan(
-            source_repo_id=source_repo_id,
-            target_repo_id=target_repo_id
-        )
+        # Build plan; unmatched seeds are the caller's to fix
+        try:
+            plan = await run_in_threadpool(
+                planner.build_plan,
+                source_repo_id=source_repo_id,
+                target_repo_id=target_repo_id,
+                target_branch=payload.target_branch or "main",
+                seeds=payload.seeds
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
         print("[DEBUG] Plan:", plan)
 
@@ -53,9 +66,11 @@ async def execute_replication(payload: ReplicationExecutionRequest):
         plan["target_branch"] = payload.target_branch or "main"
 
         # Execute
-        result = executor.execute_replication(plan)
+        result = await run_in_threadpool(executor.execute_replication, plan)
         return result
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"[ERROR] execute_replication failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"{str(e)}")
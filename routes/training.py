@@ -1,31 +1,40 @@
+import os
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from services.training.federation_data_exporter import FederationDataExporter
 from services.training.architecture_pattern_analyzer import ArchitecturePatternAnalyzer
 from services.training.training_payload_generator import TrainingPayloadGenerator
 
 router = APIRouter(prefix="/training")
 
+
+def _build_training_set(output_dir):
+    exporter = FederationDataExporter()
+    analyzer = ArchitecturePatternAnalyzer()
+    generator = TrainingPayloadGenerator()
+
+    # Rows flow from a server-side cursor through both stages into the shards one at a time
+    graph_rows = exporter.iter_full_graph()
+    patterns = analyzer.iter_patterns(graph_rows)
+    payloads = generator.iter_payloads(patterns)
+    return generator.save_to_jsonl_shards(payloads, output_dir)
+
+
 @router.get("/build-training-set")
 async def build_training_set():
     try:
-        exporter = FederationDataExporter()
-        analyzer = ArchitecturePatternAnalyzer()
-        generator = TrainingPayloadGenerator()
+        output_dir = os.getenv("TRAINING_EXPORT_DIR", "training_dataset")
+        result = await run_in_threadpool(_build_training_set, output_dir)
 
-        full_graph = exporter.export_full_graph()
-        if not full_graph:
+        if not result["payloads"]:
             raise ValueError("Federation graph query returned no data")
 
-        patterns = analyzer.analyze_graph(full_graph)
-        payloads = generator.generate_payload(patterns)
-
-        if not payloads:
-            raise ValueError("Training payload generation returned empty result")
-
-        output_path = "training_dataset.jsonl"
-        generator.save_to_json(payloads, output_path)
-
-        return {"status": "training_dataset_generated", "file_path": output_path}
+        return {
+            "status": "training_dataset_generated",
+            "output_dir": output_dir,
+            "shards": result["shards"],
+            "payloads": result["payloads"]
+        }
 
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
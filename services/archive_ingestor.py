@@ -0,0 +1,36 @@
+import tarfile
+from utils.helpers import calculate_blob_sha
+from services.blob_store import get_blob_store
+
+
+class ArchiveIngestor:
+    """
+    Streams a repository tarball and yields matching members one at a time.
+
+    The archive is read with tarfile's streaming mode ("r|*"), so it is decompressed
+    on the fly and never written to disk; only the selected files pass through, and
+    each one is also dropped into the blob store for later SHA-keyed reads.
+    """
+
+    def __init__(self, extensions=(".py",)):
+        self.extensions = tuple(extensions)
+        self.blob_store = get_blob_store()
+
+    def iter_files(self, fileobj):
+        with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+
+                # GitHub tarballs wrap everything in a single "<owner>-<repo>-<sha>/" directory
+                parts = member.name.split("/", 1)
+                file_path = parts[1] if len(parts) == 2 else parts[0]
+                if not file_path.endswith(self.extensions):
+                    continue
+
+                data = archive.extractfile(member).read()
+                blob_sha = calculate_blob_sha(data)
+                if not self.blob_store.has(blob_sha):
+                    self.blob_store.put(blob_sha, data)
+
+                yield file_path, blob_sha, data
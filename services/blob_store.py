@@ -0,0 +1,53 @@
+import os
+import tempfile
+import threading
+from services.sharded_store import ShardedFileStore
+from utils.helpers import calculate_blob_sha
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class BlobStore(ShardedFileStore):
+    """
+    Persistent content-addressed store for git blobs.
+
+    Blobs are kept as sharded files (`ab/cdef...`) keyed by their git blob SHA, read
+    back through mmap, and evicted least-recently-used first once the store grows
+    past its byte budget. A SHA that is already stored never needs to be fetched again.
+    """
+
+    label = "BLOB STORE"
+
+    def __init__(self, root=None, max_bytes=None):
+        super().__init__(
+            root or os.getenv("BLOB_STORE_DIR", os.path.join(tempfile.gettempdir(), "devbot_blobs")),
+            max_bytes or os.getenv("BLOB_STORE_MAX_BYTES", str(1024 * 1024 * 1024))
+        )
+
+    def get(self, sha):
+        """
+        Returns the blob bytes, or None when the SHA is not stored.
+        """
+        return self._read(sha)
+
+    def put(self, sha, data):
+        if calculate_blob_sha(data) != sha:
+            raise ValueError(f"Blob content does not match SHA {sha}")
+        self._write(sha, data)
+
+    def stats(self):
+        return {"blobs": len(self._index), "bytes": self._size, "max_bytes": self.max_bytes}
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_blob_store():
+    global _shared_store
+    if _shared_store is None:
+        with _shared_lock:
+            if _shared_store is None:
+                _shared_store = BlobStore()
+    return _shared_store
@@ -0,0 +1,139 @@
+from settings import get_database, get_read_database
+from services.dependency_graph import DependencyResolver, DependencyIndex, group_by_file
+import os
+import threading
+import psycopg2.extras
+from collections import OrderedDict
+
+# Built indexes are shared by every manager in the process and keyed by the edge build time,
+# so a rebuild by any worker is picked up on the next lookup. Only the most recently used
+# DEPENDENCY_INDEX_CACHE_SIZE repos are kept.
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+class DependencyManager:
+    """
+    Maintains federation_edge, the import / call / inheritance edges between the files and
+    definitions of a repo, and serves a CSR DependencyIndex over them.
+    """
+
+    def __init__(self, db=None, read_db=None):
+        self.db = db or get_database()
+        self.read_db = read_db or get_read_database()
+        self.cache_size = max(1, int(os.getenv("DEPENDENCY_INDEX_CACHE_SIZE", "16")))
+
+    def has_edges_tx(self, cur, repo_pk):
+        cur.execute("SELECT 1 FROM federation_edge_state WHERE repo_id = %s", (repo_pk,))
+        return cur.fetchone() is not None
+
+    def rebuild_edges_tx(self, cur, repo_pk, page_size=None):
+        """
+        Recomputes every edge of a repo from its semantic nodes inside the caller's transaction.
+        Resolution needs the whole module map, so incremental runs still rebuild the full set.
+        """
+        page_size = int(page_size or os.getenv("SEMANTIC_BATCH_SIZE", "1000"))
+        cur.execute("SELECT file_path FROM semantic_file WHERE repo_id = %s", (repo_pk,))
+        resolver = DependencyResolver(row[0] for row in cur.fetchall())
+
+        edges = set()
+        # Server-side cursor: nodes stream in page_size batches instead of loading the whole repo
+        with cur.connection.cursor(name=f"dependency_nodes_{repo_pk}") as nodes_cur:
+            nodes_cur.itersize = page_size
+            nodes_cur.execute("""
+                SELECT file_path, node_type, name, qualname, calls, inherits_from
+                FROM semantic_node WHERE repo_id = %s
+                ORDER BY file_path
+            """, (repo_pk,))
+            for file_path, nodes in group_by_file(self._rows(nodes_cur)):
+                for source_name, target_path, target_name, edge_type in resolver.file_edges(file_path, nodes):
+                    edges.add((repo_pk, file_path, source_name, target_path, target_name, edge_type))
+
+        cur.execute("DELETE FROM federation_edge WHERE repo_id = %s", (repo_pk,))
+        psycopg2.extras.execute_values(cur, """
+            INSERT INTO federation_edge (repo_id, source_path, source_name, target_path, target_name, edge_type)
+            VALUES %s
+        """, list(edges), page_size=page_size)
+        cur.execute("""
+            INSERT INTO federation_edge_state (repo_id, edge_count, built_at) VALUES (%s, %s, clock_timestamp())
+            ON CONFLICT (repo_id) DO UPDATE SET edge_count = EXCLUDED.edge_count, built_at = EXCLUDED.built_at
+        """, (repo_pk, len(edges)))
+        print(f"[DEPENDENCIES] repo {repo_pk}: {len(edges)} edges resolved")
+        return len(edges)
+
+    @staticmethod
+    def _rows(cur):
+        columns = None
+        for row in cur:
+            # A named cursor only has a description once the first batch has been fetched
+            columns = columns or [column.name for column in cur.description]
+            yield dict(zip(columns, row))
+
+    def rebuild_edges(self, repo_pk):
+        conn = self.db.get_connection()
+        try:
+            with conn.cursor() as cur:
+                count = self.rebuild_edges_tx(cur, repo_pk)
+            conn.commit()
+            return count
+        except Exception as e:
+            conn.rollback()
+            raise Exception(f"Failed to rebuild dependency edges: {str(e)}")
+        finally:
+            self.db.release_connection(conn)
+
+    def get_edges(self, repo_pk, source_path=None, target_path=None):
+        clauses = ["repo_id = %s"]
+        params = [repo_pk]
+        if source_path:
+            clauses.append("source_path = %s")
+            params.append(source_path)
+        if target_path:
+            clauses.append("target_path = %s")
+            params.append(target_path)
+
+        conn = self.read_db.get_connection()
+        try:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                cur.execute(f"""
+                    SELECT source_path, source_name, target_path, target_name, edge_type
+                    FROM federation_edge WHERE {' AND '.join(clauses)}
+                    ORDER BY source_path, source_name, target_path, target_name
+                """, params)
+                return cur.fetchall()
+        finally:
+            self.read_db.release_connection(conn)
+
+    def get_index(self, repo_pk):
+        """
+        File-level DependencyIndex for a repo, rebuilt from federation_edge only when the
+        edges changed since the cached copy was built.
+        """
+        conn = self.read_db.get_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT built_at FROM federation_edge_state WHERE repo_id = %s", (repo_pk,))
+                row = cur.fetchone()
+                built_at = row[0] if row else None
+
+                with _indexes_lock:
+                    cached = _indexes.get(repo_pk)
+                    if cached:
+                        _indexes.move_to_end(repo_pk)
+                if cached and cached[0] == built_at:
+                    conn.commit()
+                    return cached[1]
+
+                cur.execute("SELECT DISTINCT source_path, target_path FROM federation_edge WHERE repo_id = %s", (repo_pk,))
+                index = DependencyIndex(cur.fetchall())
+            conn.commit()
+        finally:
+            self.read_db.release_connection(conn)
+
+        with _indexes_lock:
+            _indexes[repo_pk] = (built_at, index)
+            _indexes.move_to_end(repo_pk)
+            while len(_indexes) > self.cache_size:
+                _indexes.popitem(last=False)
+        print(f"[DEPENDENCIES] repo {repo_pk}: index built {index.stats()}")
+        return index
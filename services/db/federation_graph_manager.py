@@ -1,13 +1,54 @@
-from settings import Database
-from services.db.repo_manager import RepoManager
+from settings import get_database, get_async_database, get_read_database, get_async_read_database
+from services.db.repo_manager import RepoManager, AsyncRepoManager
+from psycopg.rows import dict_row
 import traceback
 import psycopg2.extras
 import sys
 
+# Matches the federation_graph_link_key unique index (migration 3), so re-linking is a no-op
+GRAPH_LINK_CONFLICT = "ON CONFLICT (repo_id, file_path, node_type, name, (COALESCE(cross_linked_to, ''))) DO NOTHING"
+GRAPH_COLUMNS = ("id", "repo_id", "file_path", "node_type", "name", "cross_linked_to", "federation_weight", "notes", "created_at")
+
+
+def _graph_query(repo_id, columns=None, node_type=None, path_prefix=None, after_id=None, limit=None):
+    """
+    Builds a keyset-paginated federation_graph query: rows come back ordered by id and the
+    next page starts after the last id seen, so every page is an index range scan.
+    """
+    columns = list(columns or GRAPH_COLUMNS)
+    unknown = [column for column in columns if column not in GRAPH_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown federation_graph columns: {unknown}")
+    # The cursor column is always returned so callers can ask for the next page
+    if "id" not in columns:
+        columns.insert(0, "id")
+
+    clauses = ["repo_id = %s"]
+    params = [repo_id]
+    if node_type:
+        clauses.append("node_type = %s")
+        params.append(node_type)
+    if path_prefix:
+        escaped = path_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        clauses.append("file_path LIKE %s")
+        params.append(escaped + "%")
+    if after_id is not None:
+        clauses.append("id > %s")
+        params.append(after_id)
+
+    query = f"SELECT {', '.join(columns)} FROM federation_graph WHERE {' AND '.join(clauses)} ORDER BY id"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(int(limit))
+    return query, params
+
+
 class FederationGraphManager:
-    def __init__(self):
-        self.db = Database()
-        self.repo_manager = RepoManager()
+    def __init__(self, db=None, read_db=None):
+        self.db = db or get_database()
+        # Graph queries and exports only read, so they may be served by a replica
+        self.read_db = read_db or get_read_database()
+        self.repo_manager = RepoManager(self.db, read_db=self.read_db)
 
     def insert_graph_link_tx(self, cur, logical_repo_id, file_path, node_type, name, cross_linked_to, federation_weight, notes):
         try:
@@ -21,9 +62,10 @@ class FederationGraphManager:
                     raise Exception(f"File path {file_path} not found in repository {logical_repo_id}")
 
             # ✅ Single safe insert
-            cur.execute("""
+            cur.execute(f"""
                 INSERT INTO federation_graph (repo_id, file_path, node_type, name, cross_linked_to, federation_weight, notes)
                 VALUES (%s, %s, %s, %s, %s, %s, %s)
+                {GRAPH_LINK_CONFLICT}
             """, (pk, file_path, node_type, name, cross_linked_to, federation_weight, notes))
 
         except Exception as e:
@@ -51,20 +93,187 @@ class FederationGraphManager:
         finally:
             self.db.release_connection(conn)
 
-    def query_graph(self, logical_repo_id):
-        repo_id = self.repo_manager.resolve_repo_pk(logical_repo_id)  # ✅ Convert to integer
+    def link_semantic_nodes_tx(self, cur, repo_pk, node_type="file", cross_linked_to=None,
+                               federation_weight=1.0, notes=None, dedup=True):
+        """
+        Links every semantic definition of a repo into federation_graph with one INSERT ... SELECT,
+        named by qualified name so methods of different classes stay distinct; imports are not linked.
 
+        Without an explicit cross_linked_to, each definition gets one row per other file its calls
+        or base classes resolve to in federation_edge (a single unlinked row if there are none).
+
+        With dedup, each (file_path, qualname, cross_linked_to) is linked once and links already
+        present in the graph for this repo and node_type are skipped. Returns the number of rows inserted.
+        """
+        if cross_linked_to is None:
+            linked_to = "e.target_path"
+            edge_join = """
+            LEFT JOIN (
+                SELECT DISTINCT source_path, source_name, target_path FROM federation_edge
+                WHERE repo_id = %(repo_pk)s AND target_path <> source_path
+            ) e ON e.source_path = sn.file_path AND e.source_name = COALESCE(sn.qualname, sn.name)"""
+        else:
+            linked_to = "%(cross_linked_to)s"
+            edge_join = ""
+
+        select = "SELECT DISTINCT" if dedup else "SELECT"
+        dedup_clause = f"""
+                AND NOT EXISTS (
+                    SELECT 1 FROM federation_graph fg
+                    WHERE fg.repo_id = sn.repo_id
+                      AND fg.file_path = sn.file_path
+                      AND fg.node_type = %(node_type)s
+                      AND fg.name = COALESCE(sn.qualname, sn.name)
+                      AND COALESCE(fg.cross_linked_to, '') = COALESCE({linked_to}, '')
+                )""" if dedup else ""
+
+        cur.execute(f"""
+            INSERT INTO federation_graph (repo_id, file_path, node_type, name, cross_linked_to, federation_weight, notes)
+            {select} sn.repo_id, sn.file_path, %(node_type)s, COALESCE(sn.qualname, sn.name),
+                   {linked_to}, %(federation_weight)s, %(notes)s
+            FROM semantic_node sn{edge_join}
+            WHERE sn.repo_id = %(repo_pk)s AND sn.node_type <> 'import'{dedup_clause}
+            {GRAPH_LINK_CONFLICT}
+        """, {
+            "repo_pk": repo_pk,
+            "node_type": node_type,
+            "cross_linked_to": cross_linked_to,
+            "federation_weight": federation_weight,
+            "notes": notes
+        })
+        return cur.rowcount
+
+    def link_semantic_nodes(self, repo_pk, **kwargs):
         conn = self.db.get_connection()
+        try:
+            with conn.cursor() as cur:
+                linked = self.link_semantic_nodes_tx(cur, repo_pk, **kwargs)
+            conn.commit()
+            return linked
+        except Exception:
+            print("❌ link_semantic_nodes FAILED")
+            print(traceback.format_exc())
+            sys.stdout.flush()
+            conn.rollback()
+            raise
+        finally:
+            self.db.release_connection(conn)
+
+    def query_graph(self, logical_repo_id, columns=None, node_type=None, path_prefix=None, after_id=None, limit=None):
+        repo_id = self.repo_manager.resolve_repo_pk(logical_repo_id)  # ✅ Convert to integer
+        query, params = _graph_query(repo_id, columns, node_type, path_prefix, after_id, limit)
+
+        conn = self.read_db.get_connection()
         try:
             with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-                cur.execute("SELECT * FROM federation_graph WHERE repo_id = %s", (repo_id,))
+                cur.execute(query, params)
                 return cur.fetchall()
         finally:
-            self.db.release_connection(conn)
+            self.read_db.release_connection(conn)
+
+    def iter_graph(self, logical_repo_id, columns=None, node_type=None, path_prefix=None, batch_size=2000):
+        """
+        Yields graph rows through a server-side cursor, holding at most batch_size rows in memory.
+        """
+        repo_id = self.repo_manager.resolve_repo_pk(logical_repo_id)
+        query, params = _graph_query(repo_id, columns, node_type, path_prefix)
+
+        conn = self.read_db.get_connection()
+        try:
+            with conn.cursor(name="federation_graph_stream", cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                cur.itersize = batch_size
+                cur.execute(query, params)
+                for row in cur:
+                    yield row
+            conn.commit()
+        finally:
+            self.read_db.release_connection(conn)
+
 
+    def iter_full_graph(self, columns=None, batch_size=2000):
+        """
+        Yields every federation_graph row across all repos through a server-side cursor.
+        """
+        columns = list(columns or GRAPH_COLUMNS)
+        unknown = [column for column in columns if column not in GRAPH_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown federation_graph columns: {unknown}")
+
+        conn = self.read_db.get_connection()
+        try:
+            with conn.cursor(name="federation_graph_export", cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                cur.itersize = batch_size
+                cur.execute(f"SELECT {', '.join(columns)} FROM federation_graph ORDER BY id")
+                for row in cur:
+                    yield row
+            conn.commit()
+        finally:
+            self.read_db.release_connection(conn)
 
     def _verify_file_existence(self, logical_repo_id, file_path):
         """
         ✅ Temporary: Always return True to fully bypass in synthetic + limited test environments.
         """
         return True
+
+
+class AsyncFederationGraphManager:
+    def __init__(self, db=None, read_db=None):
+        self.db = db or get_async_database()
+        self.read_db = read_db or get_async_read_database()
+        self.repo_manager = AsyncRepoManager(self.db, read_db=self.read_db)
+
+    async def insert_graph_link_tx(self, cur, logical_repo_id, file_path, node_type, name, cross_linked_to, federation_weight, notes):
+        pk = await self.repo_manager.resolve_repo_pk(logical_repo_id)
+        await cur.execute(f"""
+            INSERT INTO federation_graph (repo_id, file_path, node_type, name, cross_linked_to, federation_weight, notes)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            {GRAPH_LINK_CONFLICT}
+        """, (pk, file_path, node_type, name, cross_linked_to, federation_weight, notes))
+
+    async def insert_graph_link(self, repo_id, file_path, node_type, name, cross_linked_to, federation_weight, notes):
+        try:
+            async with self.db.connection() as conn:
+                async with conn.cursor() as cur:
+                    await self.insert_graph_link_tx(
+                        cur, repo_id, file_path, node_type, name,
+                        cross_linked_to, federation_weight, notes
+                    )
+        except Exception:
+            print("❌ insert_graph_link FAILED")
+            print(traceback.format_exc())
+            sys.stdout.flush()
+            raise
+
+    async def _resolve(self, repo):
+        # Accepts either the integer PK or the logical "owner/repo" id
+        return repo if isinstance(repo, int) else await self.repo_manager.resolve_repo_pk(repo)
+
+    async def query_graph(self, repo, columns=None, node_type=None, path_prefix=None, after_id=None, limit=None):
+        query, params = _graph_query(await self._resolve(repo), columns, node_type, path_prefix, after_id, limit)
+
+        async with self.read_db.connection() as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await cur.execute(query, params)
+                return await cur.fetchall()
+
+    async def query_graph_page(self, repo, limit=1000, after_id=None, columns=None, node_type=None, path_prefix=None):
+        """
+        One keyset page; next_after_id is None once the last page has been returned.
+        """
+        nodes = await self.query_graph(repo, columns, node_type, path_prefix, after_id, limit)
+        next_after_id = nodes[-1]["id"] if len(nodes) == limit else None
+        return {"nodes": nodes, "next_after_id": next_after_id}
+
+    async def iter_graph(self, repo, columns=None, node_type=None, path_prefix=None, batch_size=2000):
+        """
+        Async counterpart of FederationGraphManager.iter_graph, backed by a named (server-side) cursor.
+        """
+        query, params = _graph_query(await self._resolve(repo), columns, node_type, path_prefix)
+
+        async with self.read_db.connection() as conn:
+            async with conn.cursor(name="federation_graph_stream", row_factory=dict_row) as cur:
+                cur.itersize = batch_size
+                await cur.execute(query, params)
+                async for row in cur:
+                    yield row
@@ -0,0 +1,291 @@
+import os
+import sys
+from settings import get_database
+
+# Serialises concurrent upgrades (several workers starting at once)
+MIGRATION_LOCK_ID = 7311001
+
+
+def _require_unique_repo_ids(cur):
+    cur.execute("""
+        SELECT repo_id, COUNT(*) FROM federation_repo
+        GROUP BY repo_id HAVING COUNT(*) > 1
+    """)
+    duplicates = cur.fetchall()
+    if duplicates:
+        raise Exception(
+            f"federation_repo has duplicate repo_id rows {duplicates}; "
+            "merge them before applying the unique constraint"
+        )
+
+
+def _repo_id_as_text(cur):
+    # Older databases were created with an INTEGER repo_id, but the code stores "owner/repo"
+    cur.execute("""
+        SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'federation_repo' AND column_name = 'repo_id'
+    """)
+    if cur.fetchone()[0] != "text":
+        cur.execute("ALTER TABLE federation_repo ALTER COLUMN repo_id TYPE TEXT USING repo_id::text")
+
+
+# (version, name, steps); a step is a SQL string or a callable taking the cursor.
+# Applied migrations are never edited — add a new version instead.
+MIGRATIONS = [
+    (1, "create federation tables", [
+        """
+        CREATE TABLE IF NOT EXISTS federation_repo (
+            id SERIAL PRIMARY KEY,
+            repo_id TEXT,
+            branch TEXT,
+            root_sha TEXT,
+            ingestion_date TIMESTAMP DEFAULT NOW()
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS semantic_node (
+            id SERIAL PRIMARY KEY,
+            repo_id INTEGER REFERENCES federation_repo(id),
+            file_path TEXT,
+            node_type TEXT,
+            name TEXT,
+            args JSONB,
+            docstring TEXT,
+            methods JSONB,
+            inherits_from TEXT,
+            parsed_date TIMESTAMP DEFAULT NOW()
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS patch_proposal (
+            proposal_id UUID PRIMARY KEY,
+            repo_id INTEGER REFERENCES federation_repo(id),
+            branch TEXT,
+            proposed_by TEXT,
+            commit_message TEXT,
+            patches JSONB,
+            status TEXT DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT NOW()
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS federation_graph (
+            id SERIAL PRIMARY KEY,
+            repo_id INTEGER REFERENCES federation_repo(id),
+            file_path TEXT,
+            node_type TEXT,
+            name TEXT,
+            cross_linked_to TEXT,
+            federation_weight FLOAT DEFAULT 1.0,
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT NOW()
+        )
+        """,
+        _repo_id_as_text
+    ]),
+    (2, "repo_id access-path indexes", [
+        "CREATE INDEX IF NOT EXISTS semantic_node_repo_file_idx ON semantic_node (repo_id, file_path)",
+        "CREATE INDEX IF NOT EXISTS semantic_node_repo_name_idx ON semantic_node (repo_id, name)",
+        "CREATE INDEX IF NOT EXISTS federation_graph_repo_file_idx ON federation_graph (repo_id, file_path)",
+        "CREATE INDEX IF NOT EXISTS federation_graph_repo_name_idx ON federation_graph (repo_id, name)",
+        # Keyset pages scan (repo_id, id > cursor) in id order
+        "CREATE INDEX IF NOT EXISTS federation_graph_repo_id_idx ON federation_graph (repo_id, id)",
+        "CREATE INDEX IF NOT EXISTS patch_proposal_status_idx ON patch_proposal (status, created_at)",
+        "CREATE INDEX IF NOT EXISTS patch_proposal_repo_idx ON patch_proposal (repo_id)"
+    ]),
+    (3, "unique keys for idempotent upserts", [
+        _require_unique_repo_ids,
+        "CREATE UNIQUE INDEX IF NOT EXISTS federation_repo_repo_id_key ON federation_repo (repo_id)",
+        # Graph links are derived data; keep the oldest row of each duplicate link
+        """
+        DELETE FROM federation_graph fg
+        USING federation_graph older
+        WHERE fg.repo_id = older.repo_id
+          AND fg.file_path IS NOT DISTINCT FROM older.file_path
+          AND fg.node_type IS NOT DISTINCT FROM older.node_type
+          AND fg.name IS NOT DISTINCT FROM older.name
+          AND COALESCE(fg.cross_linked_to, '') = COALESCE(older.cross_linked_to, '')
+          AND fg.id > older.id
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS federation_graph_link_key
+        ON federation_graph (repo_id, file_path, node_type, name, (COALESCE(cross_linked_to, '')))
+        """
+    ]),
+    (4, "per-file blob SHAs for incremental analysis", [
+        """
+        CREATE TABLE IF NOT EXISTS semantic_file (
+            repo_id INTEGER REFERENCES federation_repo(id),
+            file_path TEXT,
+            blob_sha TEXT,
+            analyzed_at TIMESTAMP DEFAULT NOW(),
+            PRIMARY KEY (repo_id, file_path)
+        )
+        """
+    ]),
+    (5, "qualified names, line ranges, decorators and calls on semantic nodes", [
+        """
+        ALTER TABLE semantic_node
+            ADD COLUMN IF NOT EXISTS qualname TEXT,
+            ADD COLUMN IF NOT EXISTS lineno INTEGER,
+            ADD COLUMN IF NOT EXISTS end_lineno INTEGER,
+            ADD COLUMN IF NOT EXISTS decorators JSONB,
+            ADD COLUMN IF NOT EXISTS is_async BOOLEAN DEFAULT FALSE,
+            ADD COLUMN IF NOT EXISTS calls JSONB
+        """,
+        # Rows parsed before this version have no qualname; analysis falls back to the name
+        "UPDATE semantic_node SET qualname = name WHERE qualname IS NULL"
+    ]),
+    (6, "resolved import / call / inheritance edges", [
+        """
+        CREATE TABLE IF NOT EXISTS federation_edge (
+            repo_id INTEGER REFERENCES federation_repo(id),
+            source_path TEXT,
+            source_name TEXT,
+            target_path TEXT,
+            target_name TEXT,
+            edge_type TEXT,
+            PRIMARY KEY (repo_id, source_path, source_name, edge_type, target_path, target_name)
+        )
+        """,
+        # Reverse-dependency lookups ("who uses this file")
+        "CREATE INDEX IF NOT EXISTS federation_edge_target_idx ON federation_edge (repo_id, target_path)",
+        """
+        CREATE TABLE IF NOT EXISTS federation_edge_state (
+            repo_id INTEGER PRIMARY KEY REFERENCES federation_repo(id),
+            edge_count INTEGER,
+            built_at TIMESTAMP DEFAULT NOW()
+        )
+        """
+    ])
+]
+
+# Main access paths, checked by `explain`; %(repo_pk)s / %(repo_id)s come from a sample repo
+ACCESS_PATHS = {
+    "repo_by_logical_id": "SELECT id FROM federation_repo WHERE repo_id = %(repo_id)s",
+    "semantic_nodes_by_repo": "SELECT name, file_path FROM semantic_node WHERE repo_id = %(repo_pk)s",
+    "semantic_nodes_by_file": "SELECT * FROM semantic_node WHERE repo_id = %(repo_pk)s AND file_path = 'main.py'",
+    "graph_page": "SELECT * FROM federation_graph WHERE repo_id = %(repo_pk)s AND id > 0 ORDER BY id LIMIT 1000",
+    "graph_by_name": "SELECT * FROM federation_graph WHERE repo_id = %(repo_pk)s AND name = 'main'",
+    "edges_into_file": "SELECT * FROM federation_edge WHERE repo_id = %(repo_pk)s AND target_path = 'main.py'",
+    "pending_proposals": "SELECT * FROM patch_proposal WHERE status = 'pending' ORDER BY created_at LIMIT 100"
+}
+
+
+class MigrationRunner:
+    def __init__(self, db=None):
+        self.db = db or get_database()
+
+    def _ensure_table(self, cur):
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT,
+                applied_at TIMESTAMP DEFAULT NOW()
+            )
+        """)
+
+    def applied_versions(self):
+        conn = self.db.get_connection()
+        try:
+            with conn.cursor() as cur:
+                self._ensure_table(cur)
+                cur.execute("SELECT version FROM schema_migrations")
+                versions = {row[0] for row in cur.fetchall()}
+            conn.commit()
+            return versions
+        finally:
+            self.db.release_connection(conn)
+
+    def pending(self):
+        applied = self.applied_versions()
+        return [migration for migration in MIGRATIONS if migration[0] not in applied]
+
+    def upgrade(self):
+        """
+        Applies every pending migration, each in its own transaction. Returns the versions applied.
+        """
+        applied = []
+        conn = self.db.get_connection()
+        try:
+            for version, name, steps in MIGRATIONS:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+                    self._ensure_table(cur)
+                    cur.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (version,))
+                    if cur.fetchone():
+                        conn.commit()
+                        continue
+
+                    print(f"[MIGRATIONS] Applying {version}: {name}")
+                    try:
+                        for step in steps:
+                            if callable(step):
+                                step(cur)
+                            else:
+                                cur.execute(step)
+                        cur.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+                        conn.commit()
+                    except Exception as e:
+                        conn.rollback()
+                        raise Exception(f"Migration {version} ({name}) failed: {str(e)}")
+                applied.append(version)
+        finally:
+            self.db.release_connection(conn)
+
+        print(f"[MIGRATIONS] Schema up to date ({len(applied)} applied)")
+        return applied
+
+    def explain(self):
+        """
+        Returns the query plan of every access path and flags sequential scans over the hot tables
+        (expected on near-empty tables, where the planner rightly skips the index).
+        """
+        conn = self.db.get_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT id, repo_id FROM federation_repo ORDER BY id DESC LIMIT 1")
+                row = cur.fetchone()
+                params = {"repo_pk": row[0] if row else 0, "repo_id": row[1] if row else ""}
+
+                report = {}
+                for name, query in ACCESS_PATHS.items():
+                    cur.execute("EXPLAIN " + query, params)
+                    plan = [line[0] for line in cur.fetchall()]
+                    report[name] = {
+                        "plan": plan,
+                        "seq_scan": any("Seq Scan" in line for line in plan)
+                    }
+            conn.rollback()
+            return report
+        finally:
+            self.db.release_connection(conn)
+
+
+def auto_migrate_enabled():
+    return os.getenv("DB_AUTO_MIGRATE", "true").lower() in ("1", "true", "yes")
+
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else "upgrade"
+    runner = MigrationRunner()
+
+    if command == "upgrade":
+        runner.upgrade()
+    elif command == "status":
+        pending = runner.pending()
+        print(f"Pending migrations: {[f'{version}: {name}' for version, name, _ in pending] or 'none'}")
+    elif command == "explain":
+        for name, result in runner.explain().items():
+            flag = "⚠️ SEQ SCAN" if result["seq_scan"] else "✅"
+            print(f"\n{flag} {name}")
+            for line in result["plan"]:
+                print(f"    {line}")
+    else:
+        print("Usage: python -m services.db.migrations [upgrade|status|explain]")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -1,9 +1,9 @@
-from settings import Database
+from settings import get_database, get_async_database
 import json
 
 class ProposalManager:
-    def __init__(self):
-        self.db = Database()
+    def __init__(self, db=None):
+        self.db = db or get_database()
 
     def save_proposal(self, proposal):
         conn = self.db.get_connection()
@@ -32,3 +32,29 @@ class ProposalManager:
         finally:
             self.db.release_connection(conn)
 
+
+
+class AsyncProposalManager:
+    def __init__(self, db=None):
+        self.db = db or get_async_database()
+
+    async def save_proposal(self, proposal):
+        try:
+            async with self.db.connection() as conn:
+                await conn.execute("""
+                    INSERT INTO patch_proposal (
+                        proposal_id, repo_id, branch, proposed_by,
+                        commit_message, patches, status
+                    )
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, (
+                    proposal["proposal_id"],
+                    proposal["repo_id"],
+                    proposal["branch"],
+                    proposal["proposed_by"],
+                    proposal["commit_message"],
+                    json.dumps(proposal["patches"]),
+                    proposal["status"]
+                ))
+        except Exception as e:
+            raise Exception(f"Failed to save patch proposal: {str(e)}")
@@ -1,53 +1,227 @@
-from settings import Database
+from settings import get_database, get_async_database, get_read_database, get_async_read_database
+from collections import OrderedDict
+import os
+import threading
+
+
+class RepoIdentityMap:
+    """
+    Bounded, bidirectional LRU of federation_repo id <-> logical "owner/repo" id.
+
+    Only rows read back from Postgres are cached; save_repo_tx invalidates the logical id
+    so an uncommitted or rolled-back insert can never be served from the cache.
+    """
+
+    def __init__(self, max_entries=None):
+        self.max_entries = int(max_entries or os.getenv("REPO_CACHE_MAX_ENTRIES", "10000"))
+        self._by_pk = OrderedDict()
+        self._by_id = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_pk(self, logical_repo_id):
+        with self._lock:
+            pk = self._by_id.get(logical_repo_id)
+            if pk is None:
+                self.misses += 1
+                return None
+            self._by_pk.move_to_end(pk)
+            self.hits += 1
+            return pk
+
+    def get_logical_id(self, repo_pk):
+        with self._lock:
+            logical_repo_id = self._by_pk.get(repo_pk)
+            if logical_repo_id is None:
+                self.misses += 1
+                return None
+            self._by_pk.move_to_end(repo_pk)
+            self.hits += 1
+            return logical_repo_id
+
+    def put(self, repo_pk, logical_repo_id):
+        with self._lock:
+            previous = self._by_pk.pop(repo_pk, None)
+            if previous is not None and self._by_id.get(previous) == repo_pk:
+                del self._by_id[previous]
+            self._by_pk[repo_pk] = logical_repo_id
+            self._by_id[logical_repo_id] = repo_pk
+            while len(self._by_pk) > self.max_entries:
+                evicted_pk, evicted_id = self._by_pk.popitem(last=False)
+                if self._by_id.get(evicted_id) == evicted_pk:
+                    del self._by_id[evicted_id]
+
+    def invalidate(self, logical_repo_id):
+        with self._lock:
+            pk = self._by_id.pop(logical_repo_id, None)
+            if pk is not None:
+                self._by_pk.pop(pk, None)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._by_pk), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+
+_shared_identity_map = None
+_shared_lock = threading.Lock()
+
+def get_repo_identity_map():
+    global _shared_identity_map
+    if _shared_identity_map is None:
+        with _shared_lock:
+            if _shared_identity_map is None:
+                _shared_identity_map = RepoIdentityMap()
+    return _shared_identity_map
+
+
+# Most recently ingested repos are the likeliest to be resolved again
+WARM_QUERY = "SELECT id, repo_id FROM federation_repo ORDER BY id DESC LIMIT %s"
+
 
 class RepoManager:
-    def __init__(self):
-        self.db = Database()
+    def __init__(self, db=None, identity_map=None, read_db=None):
+        self.db = db or get_database()
+        # Lookups only read, so they may be served by a replica
+        self.read_db = read_db or get_read_database()
+        self.identity_map = identity_map or get_repo_identity_map()
 
     def save_repo_tx(self, cur, logical_repo_id, branch, root_sha):
         cur.execute("""
             INSERT INTO federation_repo (repo_id, branch, root_sha)
             VALUES (%s, %s, %s)
+            ON CONFLICT (repo_id) DO UPDATE
+            SET branch = EXCLUDED.branch, root_sha = EXCLUDED.root_sha, ingestion_date = NOW()
             RETURNING id
         """, (logical_repo_id, branch, root_sha))
+        self.identity_map.invalidate(logical_repo_id)
         return cur.fetchone()[0]
 
+    def warm_cache(self):
+        conn = self.read_db.get_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(WARM_QUERY, (self.identity_map.max_entries,))
+                rows = cur.fetchall()
+        finally:
+            self.read_db.release_connection(conn)
+        for repo_pk, logical_repo_id in reversed(rows):
+            self.identity_map.put(repo_pk, logical_repo_id)
+        return len(rows)
+
     def resolve_repo_pk(self, logical_repo_id):
-        conn = self.db.get_connection()
+        pk = self.identity_map.get_pk(logical_repo_id)
+        if pk is not None:
+            return pk
+
+        conn = self.read_db.get_connection()
         try:
             with conn.cursor() as cur:
                 cur.execute("SELECT id FROM federation_repo WHERE repo_id = %s", (logical_repo_id,))
                 row = cur.fetchone()
                 if not row:
                     raise Exception(f"Repo {logical_repo_id} not found")
+                self.identity_map.put(row[0], logical_repo_id)
                 return row[0]
         except Exception as e:
             raise e
         finally:
-            self.db.release_connection(conn)
+            self.read_db.release_connection(conn)
 
     def resolve_repo_id_by_pk(self, repo_pk_id):
-        conn = self.db.get_connection()
+        logical_repo_id = self.identity_map.get_logical_id(repo_pk_id)
+        if logical_repo_id is not None:
+            return logical_repo_id
+
+        conn = self.read_db.get_connection()
         try:
             with conn.cursor() as cur:
                 cur.execute("SELECT repo_id FROM federation_repo WHERE id = %s", (repo_pk_id,))
                 row = cur.fetchone()
                 if not row:
                     raise Exception(f"PK {repo_pk_id} not found")
+                self.identity_map.put(repo_pk_id, row[0])
                 return row[0]
         except Exception as e:
             raise e
         finally:
-            self.db.release_connection(conn)
+            self.read_db.release_connection(conn)
 
     def try_resolve_pk(self, logical_repo_id):
-        conn = self.db.get_connection()
+        pk = self.identity_map.get_pk(logical_repo_id)
+        if pk is not None:
+            return pk
+
+        conn = self.read_db.get_connection()
         try:
             with conn.cursor() as cur:
                 cur.execute("SELECT id FROM federation_repo WHERE repo_id = %s", (logical_repo_id,))
                 row = cur.fetchone()
+                if row:
+                    self.identity_map.put(row[0], logical_repo_id)
                 return row[0] if row else None
         except Exception as e:
             raise e
         finally:
-            self.db.release_connection(conn)
+            self.read_db.release_connection(conn)
+
+
+class AsyncRepoManager:
+    def __init__(self, db=None, identity_map=None, read_db=None):
+        self.db = db or get_async_database()
+        self.read_db = read_db or get_async_read_database()
+        self.identity_map = identity_map or get_repo_identity_map()
+
+    async def save_repo_tx(self, cur, logical_repo_id, branch, root_sha):
+        await cur.execute("""
+            INSERT INTO federation_repo (repo_id, branch, root_sha)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (repo_id) DO UPDATE
+            SET branch = EXCLUDED.branch, root_sha = EXCLUDED.root_sha, ingestion_date = NOW()
+            RETURNING id
+        """, (logical_repo_id, branch, root_sha))
+        self.identity_map.invalidate(logical_repo_id)
+        return (await cur.fetchone())[0]
+
+    async def warm_cache(self):
+        async with self.read_db.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(WARM_QUERY, (self.identity_map.max_entries,))
+                rows = await cur.fetchall()
+        for repo_pk, logical_repo_id in reversed(rows):
+            self.identity_map.put(repo_pk, logical_repo_id)
+        return len(rows)
+
+    async def resolve_repo_pk(self, logical_repo_id):
+        pk = await self.try_resolve_pk(logical_repo_id)
+        if pk is None:
+            raise Exception(f"Repo {logical_repo_id} not found")
+        return pk
+
+    async def resolve_repo_id_by_pk(self, repo_pk_id):
+        logical_repo_id = self.identity_map.get_logical_id(repo_pk_id)
+        if logical_repo_id is not None:
+            return logical_repo_id
+
+        async with self.read_db.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT repo_id FROM federation_repo WHERE id = %s", (repo_pk_id,))
+                row = await cur.fetchone()
+        if not row:
+            raise Exception(f"PK {repo_pk_id} not found")
+        self.identity_map.put(repo_pk_id, row[0])
+        return row[0]
+
+    async def try_resolve_pk(self, logical_repo_id):
+        pk = self.identity_map.get_pk(logical_repo_id)
+        if pk is not None:
+            return pk
+
+        async with self.read_db.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT id FROM federation_repo WHERE repo_id = %s", (logical_repo_id,))
+                row = await cur.fetchone()
+        if not row:
+            return None
+        self.identity_map.put(row[0], logical_repo_id)
+        return row[0]
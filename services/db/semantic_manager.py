@@ -1,30 +1,198 @@
-from settings import Database
+from settings import get_database, get_async_database
+import os
 import json
+import psycopg2.extras
+
+SEMANTIC_LOCK_CLASS = 7311002
+SEMANTIC_NODE_COLUMNS = (
+    "repo_id, file_path, node_type, name, args, docstring, methods, inherits_from, "
+    "qualname, lineno, end_lineno, decorators, is_async, calls"
+)
+SEMANTIC_NODE_VALUES = "(" + ", ".join(["%s"] * len(SEMANTIC_NODE_COLUMNS.split(","))) + ")"
+
+
+def _node_row(repo_pk, node):
+    return (
+        repo_pk,
+        node.get("file_path"),
+        node.get("node_type"),
+        node.get("name"),
+        json.dumps(node.get("args")),
+        node.get("docstring"),
+        json.dumps(node.get("methods")),
+        # Stored as before ("{Base,Mixin}"); a tuple would be adapted as a row value
+        list(node["inherits_from"]) if node.get("inherits_from") is not None else None,
+        node.get("qualname") or node.get("name"),
+        node.get("lineno"),
+        node.get("end_lineno"),
+        json.dumps(node.get("decorators")),
+        bool(node.get("is_async")),
+        json.dumps(node.get("calls"))
+    )
+
 
 class SemanticManager:
-    def __init__(self):
-        self.db = Database()
+    def __init__(self, db=None):
+        self.db = db or get_database()
 
     def save_semantic_node(self, repo_pk, node):
         conn = self.db.get_connection()
         try:
             with conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO semantic_node (repo_id, file_path, node_type, name, args, docstring, methods, inherits_from)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    repo_pk,
-                    node.get("file_path"),
-                    node.get("node_type"),
-                    node.get("name"),
-                    json.dumps(node.get("args")),
-                    node.get("docstring"),
-                    json.dumps(node.get("methods")),
-                    node.get("inherits_from")
-                ))
+                cur.execute(f"""
+                    INSERT INTO semantic_node ({SEMANTIC_NODE_COLUMNS})
+                    VALUES {SEMANTIC_NODE_VALUES}
+                """, _node_row(repo_pk, node))
             conn.commit()
         except Exception as e:
             conn.rollback()
             raise Exception(f"Failed to save semantic node: {str(e)}")
         finally:
             self.db.release_connection(conn)
+
+    def save_semantic_nodes_tx(self, cur, repo_pk, nodes, page_size=1000):
+        psycopg2.extras.execute_values(
+            cur,
+            f"INSERT INTO semantic_node ({SEMANTIC_NODE_COLUMNS}) VALUES %s",
+            [_node_row(repo_pk, node) for node in nodes],
+            page_size=page_size
+        )
+
+    def get_file_shas(self, repo_pk):
+        """
+        Blob SHA each file of the repo was last analyzed at, keyed by path.
+        """
+        conn = self.db.get_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT file_path, blob_sha FROM semantic_file WHERE repo_id = %s", (repo_pk,))
+                return dict(cur.fetchall())
+        finally:
+            self.db.release_connection(conn)
+
+    def writer(self, repo_pk, batch_size=None):
+        return SemanticNodeWriter(self, repo_pk, batch_size)
+
+
+class SemanticNodeWriter:
+    """
+    Buffers semantic nodes for one analysis run and writes them with execute_values.
+
+    The buffer is flushed whenever it reaches batch_size (SEMANTIC_BATCH_SIZE), so memory
+    stays bounded however many nodes a run produces; every flush shares one connection and
+    one transaction, committed when the writer closes and rolled back if the run fails.
+
+    Files registered with replace_file have their previous nodes deleted and their blob SHA
+    recorded in semantic_file as part of the same flush, so re-analysis swaps a file's nodes
+    atomically and never duplicates them.
+    """
+
+    def __init__(self, manager, repo_pk, batch_size=None):
+        self.manager = manager
+        self.repo_pk = repo_pk
+        self.batch_size = int(batch_size or os.getenv("SEMANTIC_BATCH_SIZE", "1000"))
+        self.buffer = []
+        self.files = {}
+        self.written = 0
+        self.conn = None
+
+    def __enter__(self):
+        self.conn = self.manager.db.get_connection()
+        try:
+            with self.conn.cursor() as cur:
+                # Concurrent analyses of one repo would interleave deletes and inserts
+                cur.execute("SELECT pg_advisory_xact_lock(%s, %s)", (SEMANTIC_LOCK_CLASS, self.repo_pk))
+        except Exception:
+            self.manager.db.release_connection(self.conn)
+            self.conn = None
+            raise
+        return self
+
+    def file_shas(self):
+        """
+        Blob SHA of each file as recorded under this writer's lock, keyed by path.
+        """
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT file_path, blob_sha FROM semantic_file WHERE repo_id = %s", (self.repo_pk,))
+            return dict(cur.fetchall())
+
+    def replace_file(self, file_path, blob_sha, nodes):
+        self.files[file_path] = blob_sha
+        for node in nodes:
+            node["file_path"] = file_path
+            self.add(node)
+
+    def remove_files(self, file_paths):
+        file_paths = list(file_paths)
+        if not file_paths:
+            return
+        with self.conn.cursor() as cur:
+            cur.execute("DELETE FROM semantic_node WHERE repo_id = %s AND file_path = ANY(%s)", (self.repo_pk, file_paths))
+            cur.execute("DELETE FROM semantic_file WHERE repo_id = %s AND file_path = ANY(%s)", (self.repo_pk, file_paths))
+
+    def clear(self):
+        """
+        Drops every node of the repo, e.g. rows written before file SHAs were tracked.
+        """
+        with self.conn.cursor() as cur:
+            cur.execute("DELETE FROM semantic_node WHERE repo_id = %s", (self.repo_pk,))
+            cur.execute("DELETE FROM semantic_file WHERE repo_id = %s", (self.repo_pk,))
+
+    def add(self, node):
+        self.buffer.append(node)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, nodes):
+        for node in nodes:
+            self.add(node)
+
+    def flush(self):
+        if not self.buffer and not self.files:
+            return
+        with self.conn.cursor() as cur:
+            if self.files:
+                cur.execute(
+                    "DELETE FROM semantic_node WHERE repo_id = %s AND file_path = ANY(%s)",
+                    (self.repo_pk, list(self.files))
+                )
+            if self.buffer:
+                self.manager.save_semantic_nodes_tx(cur, self.repo_pk, self.buffer, page_size=self.batch_size)
+            if self.files:
+                psycopg2.extras.execute_values(cur, """
+                    INSERT INTO semantic_file (repo_id, file_path, blob_sha) VALUES %s
+                    ON CONFLICT (repo_id, file_path)
+                    DO UPDATE SET blob_sha = EXCLUDED.blob_sha, analyzed_at = NOW()
+                """, [(self.repo_pk, file_path, blob_sha) for file_path, blob_sha in self.files.items()],
+                    page_size=self.batch_size)
+        self.written += len(self.buffer)
+        self.buffer = []
+        self.files = {}
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.flush()
+                self.conn.commit()
+                print(f"[SEMANTIC WRITER] Persisted {self.written} nodes for repo {self.repo_pk}")
+            else:
+                self.conn.rollback()
+        finally:
+            self.manager.db.release_connection(self.conn)
+            self.conn = None
+        return False
+
+
+class AsyncSemanticManager:
+    def __init__(self, db=None):
+        self.db = db or get_async_database()
+
+    async def save_semantic_node(self, repo_pk, node):
+        try:
+            async with self.db.connection() as conn:
+                await conn.execute(f"""
+                    INSERT INTO semantic_node ({SEMANTIC_NODE_COLUMNS})
+                    VALUES {SEMANTIC_NODE_VALUES}
+                """, _node_row(repo_pk, node))
+        except Exception as e:
+            raise Exception(f"Failed to save semantic node: {str(e)}")
@@ -0,0 +1,339 @@
+import heapq
+from array import array
+
+
+def module_name(file_path):
+    """
+    Dotted module a repo file defines: "pkg/mod.py" -> "pkg.mod", "pkg/__init__.py" -> "pkg".
+    """
+    parts = file_path[:-3].split("/") if file_path.endswith(".py") else file_path.split("/")
+    if parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts)
+
+
+def _parse_text_array(value):
+    # inherits_from is a TEXT column holding array literals such as "{Base,mod.Mixin}"
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [item.strip('"') for item in value.strip("{}").split(",") if item]
+
+
+class DependencyResolver:
+    """
+    Resolves the imports, call targets and base classes recorded on semantic nodes to files
+    of the same repo. Anything outside the repo (stdlib, third-party) is dropped, as are calls
+    on values whose type the parser cannot know (other than self / cls).
+    """
+
+    def __init__(self, file_paths):
+        file_paths = [file_path for file_path in file_paths if file_path.endswith(".py")]
+        packages = {file_path.rsplit("/", 1)[0] for file_path in file_paths if file_path.endswith("/__init__.py")}
+        self.modules = {}
+        aliases = {}
+        for file_path in file_paths:
+            module = module_name(file_path)
+            self.modules[module] = file_path
+            # "src/pkg/mod.py" is imported as "pkg.mod": strip a leading source root that is not a
+            # package itself when a package follows it. Other tails ("routes/github.py" as
+            # "github") are left alone, or stdlib / third-party imports would land on repo files.
+            parts = file_path.split("/")
+            for start in range(1, len(parts) - 1):
+                if "/".join(parts[:start]) in packages:
+                    break
+                if "/".join(parts[:start + 1]) in packages:
+                    alias = ".".join(module.split(".")[start:])
+                    aliases[alias] = file_path if alias not in aliases else None
+                    break
+        for alias, file_path in aliases.items():
+            if file_path is not None:
+                self.modules.setdefault(alias, file_path)
+
+    def _absolute(self, file_path, target):
+        """
+        Absolute dotted name of an import target, resolving leading dots against the importing file.
+        None when the relative import climbs above the repo root.
+        """
+        level = len(target) - len(target.lstrip("."))
+        if not level:
+            return target
+        package = module_name(file_path).split(".")
+        if not file_path.endswith("__init__.py"):
+            package = package[:-1]
+        if level - 1 > len(package):
+            return None
+        base = package[:len(package) - (level - 1)]
+        rest = target[level:]
+        return ".".join(base + [rest] if rest else base)
+
+    def resolve(self, dotted):
+        """
+        (file_path, symbol) for the longest repo module prefix of a dotted name, or None.
+        """
+        parts = dotted.split(".")
+        for end in range(len(parts), 0, -1):
+            file_path = self.modules.get(".".join(parts[:end]))
+            if file_path is not None:
+                return file_path, ".".join(parts[end:])
+        return None
+
+    def file_edges(self, file_path, nodes):
+        """
+        Yields (source_name, target_path, target_name, edge_type) for one file's semantic nodes,
+        each node a dict with node_type, name, qualname, calls and inherits_from.
+        """
+        bindings = {}
+        local = set()
+        for node in nodes:
+            if node["node_type"] == "import":
+                bound, target = node["qualname"], self._absolute(file_path, node["name"])
+                if not target:
+                    continue
+                # "import a.b" binds "a"; "import a.b as c" and "from a import b" bind the full target
+                bindings[bound] = bound if target.startswith(bound + ".") and not node["name"].startswith(".") else target
+                resolved = self.resolve(target)
+                if resolved:
+                    yield "", resolved[0], resolved[1], "import"
+            else:
+                local.add(node["qualname"] or node["name"])
+
+        def resolve_reference(reference, scope):
+            head, _, rest = reference.partition(".")
+            if head in ("self", "cls") and rest and "." in scope:
+                owner = scope.rsplit(".", 1)[0]
+                method = rest.split(".")[0]
+                return (file_path, f"{owner}.{method}") if f"{owner}.{method}" in local else None
+            if head in bindings:
+                return self.resolve(f"{bindings[head]}.{rest}" if rest else bindings[head])
+            if head in local:
+                return file_path, reference
+            return None
+
+        for node in nodes:
+            node_type = node["node_type"]
+            if node_type == "import":
+                continue
+            scope = node["qualname"] or node["name"]
+            references = [(call, "call") for call in node.get("calls") or ()]
+            if node_type == "class":
+                references += [(base, "inherits") for base in _parse_text_array(node.get("inherits_from"))]
+            for reference, edge_type in references:
+                resolved = resolve_reference(reference, scope)
+                if resolved and (resolved[0], resolved[1]) != (file_path, scope):
+                    yield scope, resolved[0], resolved[1], edge_type
+
+
+class DependencyIndex:
+    """
+    File-level dependency graph of one repo in CSR (compressed sparse row) form.
+
+    Paths are interned to integer ids and adjacency lives in flat `array` buffers, forward and
+    reverse, so a closure over 100k nodes touches a few contiguous arrays instead of
+    per-node Python lists or sets.
+    """
+
+    def __init__(self, edges):
+        """
+        `edges` is an iterable of (source_path, target_path); self-edges and duplicates are dropped.
+        """
+        self.paths = []
+        self.ids = {}
+        pairs = set()
+        for source_path, target_path in edges:
+            if source_path != target_path:
+                pairs.add((self._intern(source_path), self._intern(target_path)))
+
+        self.edge_count = len(pairs)
+        self.offsets, self.targets = self._csr(pairs, 0, 1)
+        self.reverse_offsets, self.sources = self._csr(pairs, 1, 0)
+
+    def _intern(self, path):
+        node_id = self.ids.get(path)
+        if node_id is None:
+            node_id = self.ids[path] = len(self.paths)
+            self.paths.append(path)
+        return node_id
+
+    def _csr(self, pairs, row, column):
+        counts = array("l", [0]) * (len(self.paths) + 1)
+        for pair in pairs:
+            counts[pair[row] + 1] += 1
+        for node_id in range(len(self.paths)):
+            counts[node_id + 1] += counts[node_id]
+        columns = array("l", [0]) * len(pairs)
+        fill = array("l", counts)
+        for pair in pairs:
+            columns[fill[pair[row]]] = pair[column]
+            fill[pair[row]] += 1
+        return counts, columns
+
+    def _walk(self, paths, offsets, columns, include_seeds):
+        seeds = [self.ids[path] for path in paths if path in self.ids]
+        visited = bytearray(len(self.paths))
+        for node_id in seeds:
+            visited[node_id] = 1
+        stack = list(seeds)
+        found = []
+        while stack:
+            node_id = stack.pop()
+            for column in columns[offsets[node_id]:offsets[node_id + 1]]:
+                if not visited[column]:
+                    visited[column] = 1
+                    found.append(column)
+                    stack.append(column)
+        result = [self.paths[node_id] for node_id in found]
+        if include_seeds:
+            # Seeds unknown to the graph (no resolved edges) are still part of their own closure
+            result = list(dict.fromkeys(list(paths) + result))
+        return result
+
+    def dependencies(self, path):
+        node_id = self.ids.get(path)
+        if node_id is None:
+            return []
+        return [self.paths[column] for column in self.targets[self.offsets[node_id]:self.offsets[node_id + 1]]]
+
+    def dependents(self, path):
+        node_id = self.ids.get(path)
+        if node_id is None:
+            return []
+        return [self.paths[column] for column in self.sources[self.reverse_offsets[node_id]:self.reverse_offsets[node_id + 1]]]
+
+    def closure(self, paths, include_seeds=True):
+        """
+        Every file the given files transitively depend on.
+        """
+        return self._walk(paths, self.offsets, self.targets, include_seeds)
+
+    def reverse_closure(self, paths, include_seeds=True):
+        """
+        Every file that transitively depends on the given files.
+        """
+        return self._walk(paths, self.reverse_offsets, self.sources, include_seeds)
+
+    def _components(self, members):
+        """
+        Strongly connected components of the subgraph induced by `members` (a bytearray over
+        node ids), via an iterative Tarjan over the forward CSR arrays. Components come out
+        dependencies first; returns (component id per node id, list of components).
+        """
+        offsets, targets = self.offsets, self.targets
+        order = array("l", [-1]) * len(self.paths)
+        low = array("l", [0]) * len(self.paths)
+        on_stack = bytearray(len(self.paths))
+        component_of = array("l", [-1]) * len(self.paths)
+        components = []
+        stack = []
+        counter = 0
+
+        for root in range(len(self.paths)):
+            if not members[root] or order[root] != -1:
+                continue
+            order[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [(root, offsets[root])]
+            while work:
+                node_id, edge = work[-1]
+                end = offsets[node_id + 1]
+                descended = False
+                while edge < end:
+                    column = targets[edge]
+                    edge += 1
+                    if not members[column]:
+                        continue
+                    if order[column] == -1:
+                        work[-1] = (node_id, edge)
+                        order[column] = low[column] = counter
+                        counter += 1
+                        stack.append(column)
+                        on_stack[column] = 1
+                        work.append((column, offsets[column]))
+                        descended = True
+                        break
+                    if on_stack[column] and order[column] < low[node_id]:
+                        low[node_id] = order[column]
+                if descended:
+                    continue
+
+                work.pop()
+                if work and low[node_id] < low[work[-1][0]]:
+                    low[work[-1][0]] = low[node_id]
+                if low[node_id] == order[node_id]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component_of[member] = len(components)
+                        component.append(member)
+                        if member == node_id:
+                            break
+                    components.append(component)
+        return component_of, components
+
+    def topological_order(self, paths):
+        """
+        Orders the given files so each comes after the files it depends on (within the set).
+        Import cycles are collapsed into their strongly connected components, each emitted as
+        one block; only members of multi-file components are returned in `cyclic`.
+        Returns (ordered_paths, cyclic).
+        """
+        paths = list(dict.fromkeys(paths))
+        members = bytearray(len(self.paths))
+        for path in paths:
+            node_id = self.ids.get(path)
+            if node_id is not None:
+                members[node_id] = 1
+        component_of, components = self._components(members)
+
+        # Kahn over the condensed graph; ties are taken in path order so plans are reproducible
+        blocks = [sorted(self.paths[node_id] for node_id in component) for component in components]
+        remaining = [0] * len(components)
+        dependents = [[] for _ in components]
+        for index, component in enumerate(components):
+            targets = set()
+            for node_id in component:
+                for column in self.targets[self.offsets[node_id]:self.offsets[node_id + 1]]:
+                    if members[column] and component_of[column] != index:
+                        targets.add(component_of[column])
+            remaining[index] = len(targets)
+            for target in targets:
+                dependents[target].append(index)
+
+        # Files with no edges at all have nothing to wait for
+        ordered = [path for path in paths if path not in self.ids]
+        cyclic = []
+        ready = [(blocks[index][0], index) for index, count in enumerate(remaining) if not count]
+        heapq.heapify(ready)
+        while ready:
+            index = heapq.heappop(ready)[1]
+            ordered.extend(blocks[index])
+            if len(blocks[index]) > 1:
+                cyclic.extend(blocks[index])
+            for dependent in dependents[index]:
+                remaining[dependent] -= 1
+                if not remaining[dependent]:
+                    heapq.heappush(ready, (blocks[dependent][0], dependent))
+        return ordered, cyclic
+
+    def stats(self):
+        return {"files": len(self.paths), "edges": self.edge_count}
+
+
+def group_by_file(rows):
+    """
+    Groups semantic node rows (dicts with file_path) that arrive ordered by file_path.
+    """
+    current, nodes = None, []
+    for row in rows:
+        if row["file_path"] != current:
+            if nodes:
+                yield current, nodes
+            current, nodes = row["file_path"], []
+        nodes.append(row)
+    if nodes:
+        yield current, nodes
+
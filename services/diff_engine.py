@@ -1,73 +1,97 @@
-import os
-import requests
-import base64
+import urllib.parse
+from utils.helpers import calculate_sha
+from services.github_service import GitHubService
 
 class DiffEngine:
     def __init__(self):
         self.base_url = "https://api.github.com"
-        self.headers = {
-            "Authorization": f"Bearer {os.getenv('FEDERATION_GITHUB_TOKEN')}",
-            "Accept": "application/vnd.github.v3+json"
-        }
+        self.github = GitHubService()
 
     def apply_patch(self, owner, repo, branch, patches, commit_message):
         # Step 1: Get latest commit SHA & tree SHA
         ref_url = f"{self.base_url}/repos/{owner}/{repo}/git/ref/heads/{branch}"
-        ref_resp = requests.get(ref_url, headers=self.headers)
-        ref_resp.raise_for_status()
-        latest_commit_sha = ref_resp.json()["object"]["sha"]
+        latest_commit_sha = self._request("GET", ref_url)["object"]["sha"]
 
         commit_url = f"{self.base_url}/repos/{owner}/{repo}/git/commits/{latest_commit_sha}"
-        commit_resp = requests.get(commit_url, headers=self.headers)
-        commit_resp.raise_for_status()
-        base_tree_sha = commit_resp.json()["tree"]["sha"]
+        base_tree_sha = self._request("GET", commit_url)["tree"]["sha"]
+
+        # Step 2: Verify SHA state (safety guard) for every patch from one recursive tree read
+        existing_shas = self._get_tree_shas(owner, repo, branch, base_tree_sha, [p["file_path"] for p in patches])
 
-        # Step 2: Upload new blobs for each updated file
-        blobs = []
+        pending = {}
         for patch in patches:
             file_path = patch["file_path"]
             base_sha = patch["base_sha"]
-            updated_content = patch["updated_content"]
+            existing_file_sha = existing_shas.get(file_path)
 
-            # Verify SHA state (safety guard)
-            existing_file_sha = self._get_file_sha(owner, repo, branch, file_path)
-            if existing_file_sha != base_sha:
+            # "latest" accepts whatever the branch currently holds (same convention as commit_patch)
+            if base_sha != "latest" and existing_file_sha != base_sha and (existing_file_sha or base_sha):
                 raise Exception(f"SHA mismatch on file {file_path}: expected {base_sha}, found {existing_file_sha}")
 
-            blob_sha = self._create_blob(owner, repo, updated_content)
-            blobs.append({
-                "path": file_path,
-                "mode": "100644",
-                "type": "blob",
-                "sha": blob_sha
-            })
+            # Unchanged content needs neither a blob nor a tree entry
+            if calculate_sha(patch["updated_content"]) == existing_file_sha:
+                continue
+            pending[file_path] = patch["updated_content"]
+
+        if not pending:
+            print(f"[DIFF ENGINE] All {len(patches)} patches match {branch}, nothing to commit")
+            return {"commit_sha": latest_commit_sha, "files_changed": 0}
 
-        # Step 3: Create new tree object
+        # Step 3: Upload each distinct blob once, concurrently
+        unique_contents = list(dict.fromkeys(pending.values()))
+        blob_shas = dict(zip(unique_contents, self.github._fetch_many(
+            lambda content: self._create_blob_async(owner, repo, content),
+            unique_contents
+        )))
+        blobs = [
+            {"path": file_path, "mode": "100644", "type": "blob", "sha": blob_shas[content]}
+            for file_path, content in pending.items()
+        ]
+
+        # Step 4: Create new tree object
         tree_sha = self._create_tree(owner, repo, base_tree_sha, blobs)
 
-        # Step 4: Create new commit object
+        # Step 5: Create new commit object
         commit_sha = self._create_commit(owner, repo, commit_message, tree_sha, latest_commit_sha)
 
-        # Step 5: Move branch reference to new commit
+        # Step 6: Move branch reference to new commit
         self._move_branch(owner, repo, branch, commit_sha)
 
-        return {"commit_sha": commit_sha}
+        return {"commit_sha": commit_sha, "files_changed": len(blobs)}
+
+    def _request(self, method, url, **kwargs):
+        return self.github._request(method, url, **kwargs)
+
+    def _get_tree_shas(self, owner, repo, branch, tree_sha, file_paths):
+        tree = self.github._get_repo_tree(owner, repo, tree_sha, recursive=True)
+        shas = {entry["path"]: entry["sha"] for entry in tree.get("tree", []) if entry.get("type") == "blob"}
+
+        # GitHub truncates very large trees; look up whatever the listing did not cover
+        if tree.get("truncated"):
+            missing = [path for path in file_paths if path not in shas]
+
+            async def lookup(file_path):
+                try:
+                    return await self._get_file_sha_async(owner, repo, branch, file_path)
+                except Exception:
+                    return None
+
+            for path, sha in zip(missing, self.github._fetch_many(lookup, missing)):
+                if sha:
+                    shas[path] = sha
+        return shas
 
-    def _get_file_sha(self, owner, repo, branch, file_path):
-        url = f"{self.base_url}/repos/{owner}/{repo}/contents/{file_path}?ref={branch}"
-        resp = requests.get(url, headers=self.headers)
-        resp.raise_for_status()
-        return resp.json()["sha"]
+    async def _get_file_sha_async(self, owner, repo, branch, file_path):
+        url = f"{self.base_url}/repos/{owner}/{repo}/contents/{urllib.parse.quote(file_path)}?ref={branch}"
+        return (await self.github._request_async("GET", url))["sha"]
 
-    def _create_blob(self, owner, repo, content):
+    async def _create_blob_async(self, owner, repo, content):
         url = f"{self.base_url}/repos/{owner}/{repo}/git/blobs"
         body = {
             "content": content,
             "encoding": "utf-8"
         }
-        resp = requests.post(url, headers=self.headers, json=body)
-        resp.raise_for_status()
-        return resp.json()["sha"]
+        return (await self.github._request_async("POST", url, json=body))["sha"]
 
     def _create_tree(self, owner, repo, base_tree_sha, blobs):
         url = f"{self.base_url}/repos/{owner}/{repo}/git/trees"
@@ -75,9 +99,7 @@ class DiffEngine:
             "base_tree": base_tree_sha,
             "tree": blobs
         }
-        resp = requests.post(url, headers=self.headers, json=body)
-        resp.raise_for_status()
-        return resp.json()["sha"]
+        return self._request("POST", url, json=body)["sha"]
 
     def _create_commit(self, owner, repo, message, tree_sha, parent_commit_sha):
         url = f"{self.base_url}/repos/{owner}/{repo}/git/commits"
@@ -86,12 +108,9 @@ class DiffEngine:
             "tree": tree_sha,
             "parents": [parent_commit_sha]
         }
-        resp = requests.post(url, headers=self.headers, json=body)
-        resp.raise_for_status()
-        return resp.json()["sha"]
+        return self._request("POST", url, json=body)["sha"]
 
     def _move_branch(self, owner, repo, branch, commit_sha):
         url = f"{self.base_url}/repos/{owner}/{repo}/git/refs/heads/{branch}"
         body = {"sha": commit_sha}
-        resp = requests.patch(url, headers=self.headers, json=body)
-        resp.raise_for_status()
+        self._request("PATCH", url, json=body)
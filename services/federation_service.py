@@ -1,20 +1,28 @@
-import os, requests, base64
+import os, base64, marshal, tempfile
 from fastapi import HTTPException
 from models.federation_schemas import ImportRepoRequest, AnalyzeRepoRequest
-from services.semantic_parser import SemanticParser
+from services.semantic_parser import SemanticParser, SemanticNode
+from services.parsing_engine import get_parsing_engine
 from services.db.repo_manager import RepoManager
 from services.db.federation_graph_manager import FederationGraphManager
 from services.db.semantic_manager import SemanticManager
-from settings import Database
+from services.db.dependency_manager import DependencyManager
+from settings import get_database
 from services.github_service import GitHubService
+from services.archive_ingestor import ArchiveIngestor
 from models.federation_schemas import CommitPatchObject
-from services.db.proposal_manager import ProposalManager
+from services.db.proposal_manager import ProposalManager, AsyncProposalManager
 from models.federation_schemas import CommitPatchRequest
 import uuid
 
 
-class FederationService:
-    from settings import Database
+def _read_spool(spool):
+    while True:
+        try:
+            yield marshal.load(spool)
+        except EOFError:
+            return
+
 
 class FederationService:
     def __init__(self):
@@ -26,13 +34,17 @@ class FederationService:
         }
 
         # Setup a shared DB pool (not a raw connection)
-        self.db = Database() 
-        self.repo_manager = RepoManager()
-        self.graph_manager = FederationGraphManager()
+        self.db = get_database()
+        self.repo_manager = RepoManager(self.db)
+        self.graph_manager = FederationGraphManager(self.db)
         self.semantic_parser = SemanticParser()
-        self.semantic_manager = SemanticManager()
+        self.parsing_engine = get_parsing_engine()
+        self.semantic_manager = SemanticManager(self.db)
+        self.dependency_manager = DependencyManager(self.db)
         self.github = GitHubService()
-        self.proposal_manager = ProposalManager()
+        self.archive_ingestor = ArchiveIngestor()
+        self.proposal_manager = ProposalManager(self.db)
+        self.async_proposal_manager = AsyncProposalManager()
 
     def import_repo(self, payload: ImportRepoRequest):
         owner, repo, branch = payload.owner, payload.repo, payload.default_branch
@@ -100,47 +112,165 @@ class FederationService:
         repo_pk = payload.repo_id
         logical_repo_id = self.repo_manager.resolve_repo_id_by_pk(repo_pk)
         owner, repo = logical_repo_id.split("/")
-        semantic_results = []
 
         branch_sha = self.github.get_branch_sha("main")["object"]["sha"]
-        repo_tree_data = self.github.get_repo_tree(branch_sha, recursive=True)
-        repo_tree = repo_tree_data["tree"]
+        known_shas = self.semantic_manager.get_file_shas(repo_pk)
+        if payload.ingest_mode == "archive":
+            files = self._iter_archive_files(branch_sha)
+        else:
+            files = self._iter_tree_files(branch_sha, known_shas)
+
+        return self._analyze_files(repo_pk, files, known_shas)
+
+    def analyze_archive(self, repo_pk, fileobj):
+        """
+        Bulk-ingest a local or already-open tarball (same layout as GitHub's tarball endpoint).
+        """
+        files = self._decode_archive_files(fileobj)
+        return self._analyze_files(repo_pk, files, self.semantic_manager.get_file_shas(repo_pk))
+
+    def _iter_tree_files(self, branch_sha, known_shas=None, batch_size=200):
+        known_shas = known_shas or {}
+        repo_tree = self.github.get_repo_tree(branch_sha, recursive=True)["tree"]
+        entries = [file for file in repo_tree if file.get("path", "").endswith(".py")]
+
+        # Files already analyzed at this blob SHA are reported without downloading them
+        stale = []
+        for file in entries:
+            if known_shas.get(file["path"]) == file["sha"]:
+                yield file["path"], file["sha"], None
+            else:
+                stale.append(file)
+
+        # Blobs are fetched concurrently across the token pool, one bounded batch at a time
+        for start in range(0, len(stale), batch_size):
+            batch = stale[start:start + batch_size]
+            blobs = self.github.get_blobs([file["sha"] for file in batch])
+
+            for file in batch:
+                file_path = file["path"]
+                data = blobs.get(file["sha"])
+                if data is None:
+                    print(f"⚠️ Skipped file {file_path} due to fetch error")
+                    yield file_path, file["sha"], None
+                    continue
+                try:
+                    file_content = data.decode()
+                except UnicodeDecodeError as e:
+                    print(f"⚠️ Skipped file {file_path} due to decode error: {e}")
+                    yield file_path, file["sha"], None
+                    continue
+
+                yield file_path, file["sha"], file_content
+
+    def _iter_archive_files(self, branch_sha):
+        with self.github.open_tarball(branch_sha) as stream:
+            yield from self._decode_archive_files(stream)
+
+    def _decode_archive_files(self, fileobj):
+        for file_path, blob_sha, data in self.archive_ingestor.iter_files(fileobj):
+            try:
+                yield file_path, blob_sha, data.decode()
+            except UnicodeDecodeError as e:
+                print(f"⚠️ Skipped file {file_path} due to decode error: {e}")
+                yield file_path, blob_sha, None
+
+    def _analyze_files(self, repo_pk, files, known_shas, sample_size=20):
+        """
+        `files` yields (file_path, blob_sha, content) for every file currently in the repo;
+        content is None when the stored nodes for that file should be kept as they are.
+        Only files whose blob SHA changed are re-parsed, and files no longer present are dropped.
+
+        Fetching and parsing run against the `known_shas` snapshot with no transaction open,
+        spooling parsed nodes to a temp file. The advisory lock is only held to re-read the
+        SHAs and apply the spooled result, so a slow fetch never blocks other runs on the repo.
+        """
+        current = {}
+        assumed = {}
+        counts = {"analyzed": 0, "unchanged": 0, "nodes": 0}
+        sample = []
+
+        def changed_files():
+            for file_path, blob_sha, file_content in files:
+                current[file_path] = blob_sha
+                if known_shas.get(file_path) == blob_sha:
+                    assumed[file_path] = blob_sha
+                    continue
+                if file_content is None:
+                    counts["unchanged"] += 1
+                    continue
+                yield file_path, blob_sha, file_content
+
+        def apply(writer, file_path, blob_sha, nodes):
+            writer.replace_file(file_path, blob_sha, nodes)
+            counts["analyzed"] += 1
+            counts["nodes"] += len(nodes)
+            if len(sample) < sample_size:
+                sample.extend(node.to_dict() for node in nodes[:sample_size - len(sample)])
+
+        with tempfile.TemporaryFile() as spool:
+            for file_path, blob_sha, nodes in self.parsing_engine.parse_stream(changed_files()):
+                marshal.dump((file_path, blob_sha, [node.as_tuple() for node in nodes]), spool)
+            spool.seek(0)
+
+            with self.semantic_manager.writer(repo_pk) as writer:
+                locked_shas = writer.file_shas()
+                if not locked_shas:
+                    # First tracked run: discard nodes from untracked (possibly duplicated) earlier runs
+                    writer.clear()
+
+                for file_path, blob_sha, rows in _read_spool(spool):
+                    if locked_shas.get(file_path) == blob_sha:
+                        # Another run already stored this blob while we were parsing
+                        counts["unchanged"] += 1
+                        continue
+                    apply(writer, file_path, blob_sha, [SemanticNode.from_tuple(row) for row in rows])
+
+                # Files skipped as unchanged whose stored SHA moved since the snapshot are redone here
+                drifted = {file_path: blob_sha for file_path, blob_sha in assumed.items() if locked_shas.get(file_path) != blob_sha}
+                counts["unchanged"] += len(assumed) - len(drifted)
+                for file_path, blob_sha, nodes in self.parsing_engine.parse_stream(self._drifted_files(drifted)):
+                    apply(writer, file_path, blob_sha, nodes)
+
+                removed = [file_path for file_path in locked_shas if file_path not in current]
+                writer.remove_files(removed)
+
+                # Edges are resolved against the final node set, in the same transaction and under the same lock
+                writer.flush()
+                with writer.conn.cursor() as cur:
+                    if counts["analyzed"] or removed or not self.dependency_manager.has_edges_tx(cur, repo_pk):
+                        self.dependency_manager.rebuild_edges_tx(cur, repo_pk)
+
+        analyzed, unchanged = counts["analyzed"], counts["unchanged"]
+        print(f"[FEDERATION ANALYZE] repo {repo_pk}: {analyzed} analyzed, {unchanged} unchanged, {len(removed)} removed")
+        return {
+            "repo_id": repo_pk,
+            "node_count": counts["nodes"],
+            "semantic_nodes": sample,
+            "files": {"analyzed": analyzed, "unchanged": unchanged, "removed": len(removed)}
+        }
 
-        for file in repo_tree:
-            file_path = file.get("path", "")
-            if not file_path.endswith(".py"):
+    def _drifted_files(self, drifted):
+        # Served from the blob store where the first pass (or the archive) left them
+        blobs = self.github.get_blobs(list(drifted.values())) if drifted else {}
+        for file_path, blob_sha in drifted.items():
+            data = blobs.get(blob_sha)
+            if data is None:
+                print(f"⚠️ Skipped file {file_path} due to fetch error")
                 continue
-
             try:
-                raw_file = self.github.get_file(file_path, "main", fallback=True)
-                file_content = base64.b64decode(raw_file["content"]).decode()
-            except Exception as e:
-                print(f"⚠️ Skipped file {file_path} due to fetch error: {e}")
-                continue
-
-            nodes = self.semantic_parser.parse_python_file(file_content)
-            for node in nodes:
-                node["file_path"] = file_path
-                self.semantic_manager.save_semantic_node(repo_pk, node)
-                semantic_results.append(node)
-
-        return {"repo_id": repo_pk, "semantic_nodes": semantic_results}
-
-
-
+                yield file_path, blob_sha, data.decode()
+            except UnicodeDecodeError as e:
+                print(f"⚠️ Skipped file {file_path} due to decode error: {e}")
 
     def _get_branch_sha(self, owner, repo, branch):
         url = f"{self.base_url}/repos/{owner}/{repo}/git/ref/heads/{branch}"
-        res = requests.get(url, headers=self.headers)
-        res.raise_for_status()
-        return res.json()["object"]["sha"]
+        return self.github._request("GET", url)["object"]["sha"]
 
     def get_repo_tree(self, owner, repo, branch):
         # Step 1: Get latest commit SHA for the branch
         ref_url = f"{self.base_url}/repos/{owner}/{repo}/git/ref/heads/{branch}"
-        ref_res = requests.get(ref_url, headers=self.headers)
-        ref_res.raise_for_status()
-        sha = ref_res.json()["object"]["sha"]
+        sha = self.github._request("GET", ref_url)["object"]["sha"]
 
         # Step 2: Get full tree using SHA
         return self.github._get_repo_tree(owner, repo, sha)
@@ -149,9 +279,7 @@ class FederationService:
 
     def _get_file_content(self, owner, repo, path):
         url = f"{self.base_url}/repos/{owner}/{repo}/contents/{path}"
-        res = requests.get(url, headers=self.headers)
-        res.raise_for_status()
-        data = res.json()
+        data = self.github._request("GET", url)
         return base64.b64decode(data["content"]).decode()
 
     def commit_patch(self, payload: CommitPatchRequest):
@@ -185,8 +313,8 @@ class FederationService:
 
 
 
-    def propose_patch(self, payload):
-        proposal = {
+    def _build_proposal(self, payload):
+        return {
             "proposal_id": str(uuid.uuid4()),
             "repo_id": int(payload.repo_id),  # ensure PK int if required
             "branch": payload.branch,
@@ -195,5 +323,11 @@ class FederationService:
             "patches": [patch.dict() for patch in payload.patches],
             "status": "pending"
         }
-        self.proposal_manager.save_proposal(proposal)
-        return {"message": "Patch proposal saved"}
\ No newline at end of file
+
+    def propose_patch(self, payload):
+        self.proposal_manager.save_proposal(self._build_proposal(payload))
+        return {"message": "Patch proposal saved"}
+
+    async def propose_patch_async(self, payload):
+        await self.async_proposal_manager.save_proposal(self._build_proposal(payload))
+        return {"message": "Patch proposal saved"}
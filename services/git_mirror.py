@@ -0,0 +1,243 @@
+import os
+import re
+import time
+import base64
+import threading
+import subprocess
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SHA_PATTERN = re.compile(r"^[0-9a-f]{40}$")
+
+
+class MirrorObjectMissing(Exception):
+    pass
+
+
+class GitMirror:
+    """
+    Local bare mirror of one GitHub repository.
+
+    Reads go through a single long-lived `git cat-file --batch` process, so a file or
+    blob read is a pipe round-trip instead of an HTTPS call. The remote branch head is
+    checked with `git ls-remote` at most once per TTL, and `git fetch` only runs when
+    that head has actually moved.
+
+    The token never goes into the remote URL (and so neither into the mirror's config nor
+    into argv): token_provider is asked for one per network command, and it is handed to
+    git as an http.extraHeader through GIT_CONFIG_* environment variables.
+    """
+
+    def __init__(self, remote_url, path, ttl=None, token_provider=None):
+        self.remote_url = remote_url
+        self.path = path
+        self.ttl = float(ttl if ttl is not None else os.getenv("GITHUB_MIRROR_TTL", "30"))
+        self.token_provider = token_provider
+        self._checked = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._batch = None
+
+        if not os.path.isdir(self.path):
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            print(f"[GIT MIRROR] Cloning {self.remote_url} into {self.path}")
+            subprocess.run(
+                ["git", "clone", "--mirror", "--quiet", self.remote_url, self.path],
+                check=True, capture_output=True, env=self._remote_env()
+            )
+        else:
+            # Mirrors cloned from a token-bearing URL kept it in their config; overwrite it
+            self._git("config", "remote.origin.url", self.remote_url)
+
+    def _remote_env(self):
+        env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+        token = self.token_provider() if self.token_provider else None
+        if token:
+            credentials = base64.b64encode(f"x-access-token:{token}".encode("utf-8")).decode("ascii")
+            env.update({
+                "GIT_CONFIG_COUNT": "1",
+                "GIT_CONFIG_KEY_0": "http.extraHeader",
+                "GIT_CONFIG_VALUE_0": f"Authorization: Basic {credentials}"
+            })
+        return env
+
+    def _git(self, *args, remote=False):
+        result = subprocess.run(
+            ["git", "--git-dir", self.path, *args],
+            check=True, capture_output=True, env=self._remote_env() if remote else None
+        )
+        return result.stdout
+
+    def _remote_head(self, branch):
+        output = self._git("ls-remote", "origin", f"refs/heads/{branch}", remote=True).decode().split()
+        return output[0] if output else None
+
+    def _local_head(self, branch):
+        try:
+            return self._git("rev-parse", "--verify", "--quiet", f"refs/heads/{branch}").decode().strip() or None
+        except subprocess.CalledProcessError:
+            return None
+
+    def refresh(self, branch):
+        """
+        Returns the branch head SHA, fetching first if the remote head moved since the last check.
+        Concurrent callers wait for one check / fetch instead of running their own.
+        """
+        checked = self._checked.get(branch)
+        if checked and time.monotonic() - checked[0] < self.ttl:
+            return checked[1]
+
+        with self._refresh_lock:
+            now = time.monotonic()
+            checked = self._checked.get(branch)
+            if checked and now - checked[0] < self.ttl:
+                return checked[1]
+
+            remote_sha = self._remote_head(branch)
+            if remote_sha and remote_sha != self._local_head(branch):
+                print(f"[GIT MIRROR] {branch} moved to {remote_sha[:7]}, fetching")
+                self._git("fetch", "--quiet", "--prune", "origin", remote=True)
+                self.close()
+
+            head = self._local_head(branch)
+            self._checked[branch] = (now, head)
+            return head
+
+    def resolve(self, ref):
+        if SHA_PATTERN.match(ref):
+            return ref
+        head = self.refresh(ref)
+        if not head:
+            raise MirrorObjectMissing(f"Branch {ref} not found in mirror")
+        return head
+
+    def read_object(self, spec):
+        """
+        Returns (sha, type, bytes) for any object spec (`<sha>` or `<rev>:<path>`) via the batch process.
+        """
+        with self._lock:
+            if self._batch is None or self._batch.poll() is not None:
+                self._batch = subprocess.Popen(
+                    ["git", "--git-dir", self.path, "cat-file", "--batch"],
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE
+                )
+
+            self._batch.stdin.write(spec.encode("utf-8") + b"\n")
+            self._batch.stdin.flush()
+            header = self._batch.stdout.readline().decode().split()
+            if len(header) != 3:
+                raise MirrorObjectMissing(f"{spec} not found in mirror")
+
+            sha, object_type, size = header
+            data = self._batch.stdout.read(int(size))
+            self._batch.stdout.read(1)
+            return sha, object_type, data
+
+    def ls_tree(self, commit_sha, recursive=True):
+        args = ["ls-tree", "-l", "-z"]
+        if recursive:
+            args += ["-r", "-t"]
+        entries = []
+        for record in self._git(*args, commit_sha).split(b"\0"):
+            if not record:
+                continue
+            meta, path = record.split(b"\t", 1)
+            mode, object_type, sha, size = meta.decode().split()
+            entry = {"path": path.decode("utf-8"), "mode": mode, "type": object_type, "sha": sha}
+            if object_type == "blob":
+                entry["size"] = int(size)
+            entries.append(entry)
+        return entries
+
+    def log(self, ref, file_path, limit=30):
+        output = self._git(
+            "log", f"-n{limit}", "--format=%H%x1f%an%x1f%ae%x1f%aI%x1f%B%x1e", ref, "--", file_path
+        ).decode("utf-8")
+        commits = []
+        for record in output.split("\x1e"):
+            record = record.strip("\n")
+            if not record:
+                continue
+            sha, name, email, date, message = record.split("\x1f", 4)
+            author = {"name": name, "email": email, "date": date}
+            commits.append({"sha": sha, "commit": {"author": author, "committer": author, "message": message.strip()}})
+        return commits
+
+    def close(self):
+        with self._lock:
+            if self._batch and self._batch.poll() is None:
+                self._batch.stdin.close()
+                self._batch.wait()
+            self._batch = None
+
+
+class MirrorBackend:
+    """
+    GitHub-shaped read API (same payloads as the REST endpoints) served from a GitMirror.
+    """
+
+    def __init__(self, mirror):
+        self.mirror = mirror
+
+    def get_branch_sha(self, branch):
+        sha = self.mirror.resolve(branch)
+        return {"ref": f"refs/heads/{branch}", "object": {"sha": sha, "type": "commit"}}
+
+    def get_repo_tree(self, ref, recursive):
+        commit_sha = self.mirror.resolve(ref)
+        tree_sha, _, _ = self.mirror.read_object(f"{commit_sha}^{{tree}}")
+        return {"sha": tree_sha, "tree": self.mirror.ls_tree(commit_sha, recursive), "truncated": False}
+
+    def get_file(self, file_path, ref):
+        commit_sha = self.mirror.resolve(ref)
+        sha, object_type, data = self.mirror.read_object(f"{commit_sha}:{file_path}")
+        if object_type != "blob":
+            raise MirrorObjectMissing(f"{file_path} is a {object_type}, not a file")
+        return {
+            "type": "file",
+            "encoding": "base64",
+            "size": len(data),
+            "name": file_path.split("/")[-1],
+            "path": file_path,
+            "sha": sha,
+            "content": base64.b64encode(data).decode("utf-8")
+        }
+
+    def get_file_history(self, file_path, ref):
+        return self.mirror.log(self.mirror.resolve(ref), file_path)
+
+    def get_blob(self, sha):
+        _, object_type, data = self.mirror.read_object(sha)
+        if object_type != "blob":
+            raise MirrorObjectMissing(f"{sha} is a {object_type}, not a blob")
+        return data
+
+
+_shared_backends = {}
+_shared_lock = threading.Lock()
+
+
+def get_mirror_backend(owner, repo, token_provider=None):
+    """
+    Returns the shared MirrorBackend for owner/repo, or None when GITHUB_MIRROR_DIR is not configured.
+
+    GITHUB_MIRROR_REMOTE is a template for the clone URL ({owner}, {repo}), without credentials;
+    a plain local path works as well, which is how tests stand in for GitHub.
+    """
+    mirror_dir = os.getenv("GITHUB_MIRROR_DIR")
+    if not mirror_dir or not owner or not repo:
+        return None
+
+    key = (owner, repo)
+    with _shared_lock:
+        if key not in _shared_backends:
+            template = os.getenv("GITHUB_MIRROR_REMOTE", "https://github.com/{owner}/{repo}.git")
+            remote_url = template.format(owner=owner, repo=repo)
+            path = os.path.join(mirror_dir, owner, f"{repo}.git")
+            try:
+                _shared_backends[key] = MirrorBackend(GitMirror(remote_url, path, token_provider=token_provider))
+            except (OSError, subprocess.CalledProcessError) as e:
+                print(f"⚠️ [GIT MIRROR] Mirror for {owner}/{repo} unavailable, using API: {e}")
+                return None
+        return _shared_backends[key]
@@ -0,0 +1,122 @@
+import os
+import json
+import hashlib
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class CachedResponse:
+    __slots__ = ("etag", "last_modified", "content_type", "body")
+
+    def __init__(self, etag, last_modified, content_type, body):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_type = content_type
+        self.body = body
+
+
+class ResponseCache:
+    """
+    Conditional-request cache for GitHub GETs.
+
+    Entries are keyed by URL and token, hold the ETag / Last-Modified validators and
+    the raw body, and live in a bounded in-memory LRU. When GITHUB_CACHE_DIR is set,
+    entries are also written to disk so validators survive restarts.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, cache_dir=None):
+        self.max_entries = int(max_entries or os.getenv("GITHUB_CACHE_MAX_ENTRIES", "2048"))
+        self.max_bytes = int(max_bytes or os.getenv("GITHUB_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+        self.cache_dir = cache_dir or os.getenv("GITHUB_CACHE_DIR")
+        self._entries = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(url, headers):
+        authorization = (headers or {}).get("Authorization", "")
+        return hashlib.sha256(f"{url}\n{authorization}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+
+        entry = self._read_disk(key)
+        if entry is not None:
+            self._store_memory(key, entry)
+        return entry
+
+    def put(self, key, response):
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+
+        entry = CachedResponse(etag, last_modified, response.headers.get("Content-Type"), response.content)
+        self._store_memory(key, entry)
+        self._write_disk(key, entry)
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def _store_memory(self, key, entry):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= len(previous.body)
+
+        self._entries[key] = entry
+        self._size += len(entry.body)
+
+        while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted.body)
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+            return CachedResponse(meta.get("etag"), meta.get("last_modified"), meta.get("content_type"), body)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, entry):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            meta = {"etag": entry.etag, "last_modified": entry.last_modified, "content_type": entry.content_type}
+            with open(tmp_path, "wb") as f:
+                f.write(json.dumps(meta).encode("utf-8") + b"\n")
+                f.write(entry.body)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ [GITHUB CACHE] Disk write failed for {key}: {e}")
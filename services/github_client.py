@@ -0,0 +1,192 @@
+import os
+import io
+import asyncio
+import threading
+import httpx
+from services.github_cache import ResponseCache
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class GitHubClient:
+    """
+    Process-wide GitHub HTTP client.
+
+    Owns one keep-alive, HTTP/2-capable httpx.AsyncClient running on a dedicated
+    event loop thread, so every service shares the same connection pool and sync
+    callers can block on a request without ever touching the caller's event loop.
+    GETs are revalidated against the ETag cache; a 304 is served from the cached
+    body and does not count against the rate limit. Identical GETs that are in
+    flight at the same time share a single upstream request.
+    """
+
+    def __init__(self, timeout=None, max_connections=None, max_keepalive=None, cache=None):
+        self.timeout = float(timeout or os.getenv("GITHUB_HTTP_TIMEOUT", "10"))
+        self.max_connections = int(max_connections or os.getenv("GITHUB_HTTP_MAX_CONNECTIONS", "50"))
+        self.max_keepalive = int(max_keepalive or os.getenv("GITHUB_HTTP_MAX_KEEPALIVE", "20"))
+
+        self.cache = cache or ResponseCache()
+        self._inflight = {}
+        self.coalesced = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="github-client", daemon=True)
+        self._thread.start()
+        self._client = self._submit(self._create_client()).result()
+
+    async def _create_client(self):
+        return httpx.AsyncClient(
+            http2=True,
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive
+            )
+        )
+
+    def _submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def _send(self, method, url, headers=None, **kwargs):
+        if method.upper() != "GET":
+            return await self._client.request(method, url, headers=headers, **kwargs)
+
+        key = self.cache.make_key(url, headers)
+        cached = self.cache.get(key)
+        request_headers = dict(headers or {})
+        if cached is not None:
+            request_headers.update(self.cache.conditional_headers(cached))
+
+        response = await self._client.request(method, url, headers=request_headers, **kwargs)
+
+        if response.status_code == 304 and cached is not None:
+            self.cache.hits += 1
+            replay_headers = httpx.Headers(response.headers)
+            replay_headers["Content-Type"] = cached.content_type or "application/json"
+            replay_headers.pop("Content-Length", None)
+            replay_headers.pop("Content-Encoding", None)
+            return httpx.Response(
+                200,
+                headers=replay_headers,
+                content=cached.body,
+                request=response.request
+            )
+
+        self.cache.misses += 1
+        if response.status_code == 200:
+            self.cache.put(key, response)
+        return response
+
+    async def _send_shared(self, method, url, headers=None, scope=None, **kwargs):
+        """
+        Single-flight wrapper around _send, always run on the client loop. Concurrent GETs with the
+        same method, URL and token scope await one upstream request; the scope defaults to the
+        Authorization header, while the scheduler passes its token pool so any token in it qualifies.
+        """
+        if method.upper() != "GET":
+            return await self._send(method, url, headers=headers, **kwargs)
+
+        if scope is None:
+            scope = (headers or {}).get("Authorization")
+        key = (method.upper(), url, scope)
+
+        shared = self._inflight.get(key)
+        if shared is not None:
+            self.coalesced += 1
+            return await asyncio.shield(shared)
+
+        shared = self._loop.create_task(self._send(method, url, headers=headers, **kwargs))
+        self._inflight[key] = shared
+        try:
+            return await asyncio.shield(shared)
+        finally:
+            if self._inflight.get(key) is shared:
+                del self._inflight[key]
+
+    async def request(self, method, url, headers=None, scope=None, **kwargs):
+        """
+        Awaitable from any event loop; the request itself runs on the client loop.
+        """
+        return await asyncio.wrap_future(self._submit(self._send_shared(method, url, headers=headers, scope=scope, **kwargs)))
+
+    def request_sync(self, method, url, headers=None, scope=None, **kwargs):
+        """
+        Blocking shim for the existing synchronous service methods.
+        """
+        return self._submit(self._send_shared(method, url, headers=headers, scope=scope, **kwargs)).result()
+
+    def run_sync(self, coro):
+        """
+        Runs a coroutine (e.g. a batch of concurrent requests) on the client loop and blocks for its result.
+        """
+        return self._submit(coro).result()
+
+    async def _open_stream(self, method, url, headers=None, on_response=None, **kwargs):
+        request = self._client.build_request(method, url, headers=headers, **kwargs)
+        response = await self._client.send(request, stream=True, follow_redirects=True)
+        if on_response:
+            on_response(response)
+        if response.status_code >= 400:
+            await response.aread()
+            await response.aclose()
+            response.raise_for_status()
+        return response
+
+    def close(self):
+        if self._loop.is_running():
+            self._submit(self._client.aclose()).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            print("🛑 [GITHUB CLIENT] Connection pool closed")
+
+
+class ResponseStream(io.RawIOBase):
+    """
+    Read-only file object over a streamed httpx response; chunks are pulled from
+    the client loop on demand, so nothing is buffered beyond the current chunk.
+    """
+
+    def __init__(self, client, response):
+        self._client = client
+        self._response = response
+        self._chunks = response.aiter_bytes()
+        self._buffer = b""
+        self._offset = 0
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    async def _next_chunk(self):
+        return await self._chunks.__anext__()
+
+    def readinto(self, buffer):
+        while self._offset >= len(self._buffer) and not self._eof:
+            try:
+                self._buffer = self._client._submit(self._next_chunk()).result()
+                self._offset = 0
+            except StopAsyncIteration:
+                self._eof = True
+
+        size = min(len(buffer), len(self._buffer) - self._offset)
+        buffer[:size] = self._buffer[self._offset:self._offset + size]
+        self._offset += size
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._client._submit(self._response.aclose()).result()
+        super().close()
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_github_client():
+    global _shared_client
+    if _shared_client is None:
+        with _shared_lock:
+            if _shared_client is None:
+                _shared_client = GitHubClient()
+    return _shared_client
@@ -0,0 +1,205 @@
+import os
+import time
+import asyncio
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def load_tokens():
+    override_token = os.getenv("FEDERATION_GITHUB_TOKEN")
+    raw_tokens = [override_token] if override_token else os.getenv("FEDERATION_GITHUB_TOKENS", "").split(",")
+    tokens = [token.strip() for token in raw_tokens if token and token.strip()]
+    return tokens or [None]
+
+
+class RateLimitExhausted(Exception):
+    pass
+
+
+class TokenState:
+    __slots__ = ("token", "remaining", "reset_at", "bucket", "refilled_at")
+
+    def __init__(self, token, burst):
+        self.token = token
+        self.remaining = None
+        self.reset_at = 0.0
+        self.bucket = float(burst)
+        self.refilled_at = time.monotonic()
+
+
+class TokenPool:
+    """
+    Tracks X-RateLimit-Remaining / X-RateLimit-Reset for every token and meters each
+    one through its own token bucket. A token whose remaining quota falls to the
+    reserve is benched until its reset time instead of being driven into a 403.
+    """
+
+    def __init__(self, tokens, rate=None, burst=None, reserve=None):
+        self.rate = float(rate if rate is not None else os.getenv("GITHUB_TOKEN_RATE", "20"))
+        self.burst = float(burst if burst is not None else os.getenv("GITHUB_TOKEN_BURST", "50"))
+        self.reserve = int(reserve if reserve is not None else os.getenv("GITHUB_TOKEN_RESERVE", "50"))
+        self._states = [TokenState(token, self.burst) for token in tokens]
+        # Requests made with any token from this pool see the same data, so they may be coalesced
+        self.scope = f"pool:{id(self)}"
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._states)
+
+    def _refill(self, state, now):
+        state.bucket = min(self.burst, state.bucket + (now - state.refilled_at) * self.rate)
+        state.refilled_at = now
+
+    def _healthy(self, state):
+        if state.remaining is None or state.remaining > self.reserve:
+            return True
+        return time.time() >= state.reset_at
+
+    def acquire(self):
+        """
+        Returns (token, 0) when a request may go out now, or (None, seconds) to wait.
+        """
+        with self._lock:
+            now = time.monotonic()
+            healthy = [state for state in self._states if self._healthy(state)]
+            if not healthy:
+                wait = min(state.reset_at for state in self._states) - time.time()
+                return None, max(wait, 0.1)
+
+            for state in healthy:
+                self._refill(state, now)
+
+            ready = [state for state in healthy if state.bucket >= 1]
+            if not ready:
+                return None, min((1 - state.bucket) / self.rate for state in healthy)
+
+            best = max(ready, key=lambda state: (state.remaining is None, state.remaining or 0, state.bucket))
+            best.bucket -= 1
+            if best.remaining is not None:
+                best.remaining -= 1
+            return best.token, 0
+
+    def best_token(self):
+        """
+        Healthiest token without spending from its bucket, for callers outside the REST quota (git over HTTPS).
+        """
+        with self._lock:
+            healthy = [state for state in self._states if self._healthy(state)] or self._states
+            return max(healthy, key=lambda state: (state.remaining is None, state.remaining or 0)).token
+
+    def record(self, token, response):
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        retry_after = response.headers.get("Retry-After")
+
+        with self._lock:
+            for state in self._states:
+                if state.token != token:
+                    continue
+                if remaining is not None:
+                    state.remaining = int(remaining)
+                if reset is not None:
+                    state.reset_at = float(reset)
+                if response.status_code in (403, 429) and (remaining == "0" or retry_after):
+                    state.remaining = 0
+                    if retry_after:
+                        state.reset_at = max(state.reset_at, time.time() + float(retry_after))
+                    print(f"[GITHUB RATE LIMIT] token benched until {state.reset_at:.0f}")
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                {"token": f"...{state.token[-4:]}" if state.token else None, "remaining": state.remaining, "reset_at": state.reset_at}
+                for state in self._states
+            ]
+
+
+class FetchScheduler:
+    """
+    Dispatches GitHub requests across all healthy tokens in a TokenPool, with a
+    bounded number of requests in flight for concurrent batches.
+    """
+
+    def __init__(self, client, pool, max_workers=None, max_wait=None):
+        self.client = client
+        self.pool = pool
+        self.max_workers = int(max_workers if max_workers is not None else os.getenv("GITHUB_FETCH_WORKERS", "16"))
+        self.max_wait = float(max_wait if max_wait is not None else os.getenv("GITHUB_RATE_LIMIT_MAX_WAIT", "60"))
+
+    async def acquire(self):
+        """
+        Waits (up to max_wait) for a token the pool allows to send now.
+        """
+        waited = 0.0
+        while True:
+            token, wait = self.pool.acquire()
+            if token is None and wait:
+                if waited + wait > self.max_wait:
+                    raise RateLimitExhausted(f"All GitHub tokens are rate limited for another {wait:.0f}s")
+                await asyncio.sleep(wait)
+                waited += wait
+                continue
+            return token
+
+    def _authorize(self, headers, token):
+        request_headers = dict(headers or {})
+        if token:
+            request_headers["Authorization"] = f"token {token}"
+        else:
+            request_headers.pop("Authorization", None)
+        return request_headers
+
+    async def open_stream(self, method, url, headers=None, **kwargs):
+        """
+        Streamed counterpart of send (e.g. tarballs): one pooled token, whose rate-limit headers
+        are recorded before the body is read. Must run on the client loop (client.run_sync).
+        """
+        token = await self.acquire()
+        return await self.client._open_stream(
+            method, url, headers=self._authorize(headers, token),
+            on_response=lambda response: self.pool.record(token, response), **kwargs
+        )
+
+    async def send(self, method, url, headers=None, **kwargs):
+        attempts = 0
+        while True:
+            token = await self.acquire()
+            request_headers = self._authorize(headers, token)
+
+            response = await self.client.request(method, url, headers=request_headers, scope=self.pool.scope, **kwargs)
+            # A coalesced response may have been sent with another token; only its sender records it
+            if response.request.headers.get("Authorization") == request_headers.get("Authorization"):
+                self.pool.record(token, response)
+
+            attempts += 1
+            rate_limited = response.status_code in (403, 429) and (
+                response.headers.get("X-RateLimit-Remaining") == "0" or response.headers.get("Retry-After")
+            )
+            if not rate_limited or attempts > len(self.pool):
+                return response
+
+    async def map(self, fn, items):
+        """
+        Runs `await fn(item)` for every item with at most max_workers in flight; results keep input order.
+        """
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def run(item):
+            async with semaphore:
+                return await fn(item)
+
+        return await asyncio.gather(*(run(item) for item in items))
+
+
+_shared_pools = {}
+_shared_lock = threading.Lock()
+
+
+def get_token_pool(tokens=None):
+    key = tuple(tokens or load_tokens())
+    with _shared_lock:
+        if key not in _shared_pools:
+            _shared_pools[key] = TokenPool(list(key))
+        return _shared_pools[key]
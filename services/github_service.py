@@ -1,9 +1,12 @@
 import os
-import requests
+import httpx
 import base64
 import urllib.parse
 from utils.helpers import encode_file_content
-from requests.exceptions import RequestException
+from services.github_client import get_github_client, ResponseStream
+from services.github_scheduler import FetchScheduler, RateLimitExhausted, get_token_pool, load_tokens
+from services.blob_store import get_blob_store
+from services.git_mirror import get_mirror_backend
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,82 +14,202 @@ load_dotenv()
 class GitHubService:
     def __init__(self):
         self.base_url = "https://api.github.com"
-        override_token = os.getenv("FEDERATION_GITHUB_TOKEN")
-        self.tokens = [override_token] if override_token else os.getenv("FEDERATION_GITHUB_TOKENS", "").split(",")
-
-        self.current_token_index = 0
-        self.token = self.tokens[self.current_token_index].strip() if self.tokens else None
+        self.tokens = load_tokens()
         self.owner = os.getenv("GITHUB_OWNER")
         self.repo = os.getenv("GITHUB_REPO")
         self.timeout = 10
+        self.client = get_github_client()
+        self.scheduler = FetchScheduler(self.client, get_token_pool(self.tokens))
+        self.blob_store = get_blob_store()
+        self.mirror = get_mirror_backend(self.owner, self.repo, self.scheduler.pool.best_token)
+        # Authorization is filled in per request by the scheduler from the token pool
         self.headers = {
-            "Authorization": f"token {self.token}",
             "Accept": "application/vnd.github.v3+json"
         }
 
-    def _rotate_token(self):
-        if len(self.tokens) > 1:
-            self.current_token_index = (self.current_token_index + 1) % len(self.tokens)
-            self.token = self.tokens[self.current_token_index].strip()
-            self.headers["Authorization"] = f"token {self.token}"
-            print(f"[GITHUB] Token rotated to index {self.current_token_index}")
+    async def _send_async(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return await self.scheduler.send(method, url, self.headers, **kwargs)
 
-    def _request(self, method, url, **kwargs):
+    def _send(self, method, url, **kwargs):
+        return self.client.run_sync(self._send_async(method, url, **kwargs))
+
+    async def _request_async(self, method, url, **kwargs):
         try:
-            response = requests.request(method, url, headers=self.headers, timeout=self.timeout, **kwargs)
+            response = await self._send_async(method, url, **kwargs)
             response.raise_for_status()
             return response.json()
-        except RequestException as e:
-            if hasattr(e.response, 'status_code') and e.response.status_code == 403:
-                if "rate limit" in str(e).lower():
-                    print(f"[GITHUB RATE LIMIT] rotating token...")
-                    self._rotate_token()
-                    return self._request(method, url, **kwargs)
+        except (httpx.HTTPError, RateLimitExhausted) as e:
             print(f"[GITHUB API ERROR] {method} {url} failed: {str(e)}")
             raise
 
+    def _request(self, method, url, **kwargs):
+        return self.client.run_sync(self._request_async(method, url, **kwargs))
+
+    def _fetch_many(self, fetch, items):
+        """
+        Runs the async `fetch(item)` for every item concurrently across the token pool.
+        """
+        return self.client.run_sync(self.scheduler.map(fetch, items))
+
+    def _from_mirror(self, read, *args):
+        """
+        Serves a read from the local git mirror when one is configured; None means "use the API".
+        """
+        if not self.mirror:
+            return None
+        try:
+            return read(*args)
+        except Exception as e:
+            print(f"⚠️ [GIT MIRROR] {read.__name__}{args} fell back to API: {e}")
+            return None
+
     def get_repo_tree(self, branch, recursive):
+        mirrored = self._from_mirror(self.mirror and self.mirror.get_repo_tree, branch, recursive)
+        if mirrored is not None:
+            return mirrored
+
         url = f"{self.base_url}/repos/{self.owner}/{self.repo}/git/trees/{branch}?recursive={1 if recursive else 0}"
         return self._request("GET", url)
 
+    def _get_repo_tree(self, owner, repo, sha, recursive=True):
+        url = f"{self.base_url}/repos/{owner}/{repo}/git/trees/{sha}?recursive={1 if recursive else 0}"
+        return self._request("GET", url)
+
+    def get_blob(self, sha, owner=None, repo=None):
+        data = self.blob_store.get(sha)
+        if data is not None:
+            return data
+
+        if (owner or self.owner, repo or self.repo) == (self.owner, self.repo):
+            data = self._from_mirror(self.mirror and self.mirror.get_blob, sha)
+            if data is not None:
+                return data
+
+        url = f"{self.base_url}/repos/{owner or self.owner}/{repo or self.repo}/git/blobs/{sha}"
+        data = base64.b64decode(self._request("GET", url)["content"])
+        self.blob_store.put(sha, data)
+        return data
+
+    def get_blobs(self, shas, owner=None, repo=None):
+        """
+        Returns {sha: bytes}; stored blobs are served locally, the rest are fetched concurrently.
+        """
+        blobs = {}
+        missing = []
+        use_mirror = (owner or self.owner, repo or self.repo) == (self.owner, self.repo)
+        for sha in dict.fromkeys(shas):
+            data = self.blob_store.get(sha)
+            if data is None and use_mirror:
+                data = self._from_mirror(self.mirror and self.mirror.get_blob, sha)
+            if data is not None:
+                blobs[sha] = data
+            else:
+                missing.append(sha)
+
+        async def fetch(sha):
+            url = f"{self.base_url}/repos/{owner or self.owner}/{repo or self.repo}/git/blobs/{sha}"
+            try:
+                return base64.b64decode((await self._request_async("GET", url))["content"])
+            except Exception as e:
+                print(f"⚠️ Blob {sha} fetch failed: {e}")
+                return None
+
+        for sha, data in zip(missing, self._fetch_many(fetch, missing)):
+            if data is not None:
+                self.blob_store.put(sha, data)
+                blobs[sha] = data
+        return blobs
+
+    def open_tarball(self, ref, owner=None, repo=None):
+        url = f"{self.base_url}/repos/{owner or self.owner}/{repo or self.repo}/tarball/{ref}"
+        # Goes through the scheduler so archive ingests are rate-limit accounted like every other call
+        response = self.client.run_sync(self.scheduler.open_stream("GET", url, self.headers, timeout=self.timeout))
+        return ResponseStream(self.client, response)
+
     def get_file(self, file_path, branch, fallback=True):
+        mirrored = self._from_mirror(self.mirror and self.mirror.get_file, file_path, branch)
+        if mirrored is None and fallback and self.mirror and branch != "main":
+            mirrored = self._from_mirror(self.mirror.get_file, file_path, "main")
+        if mirrored is not None:
+            return mirrored
+
         encoded_path = urllib.parse.quote(file_path, safe="")
         url = f"{self.base_url}/repos/{self.owner}/{self.repo}/contents/{encoded_path}?ref={branch}"
         try:
             return self._request("GET", url)
-        except RequestException as e:
-            if fallback and "404" in str(e):
+        except httpx.HTTPStatusError as e:
+            if fallback and e.response.status_code == 404:
                 print(f"⚠️ File {file_path} not found on branch {branch}, retrying on 'main'")
                 fallback_url = f"{self.base_url}/repos/{self.owner}/{self.repo}/contents/{encoded_path}?ref=main"
                 return self._request("GET", fallback_url)
             raise
 
+    async def _fetch_or_none(self, url, file_path):
+        """
+        A missing file is expected in batch reads and comes back as None; any other failure
+        (auth, exhausted rate limit, server errors) is logged and raised.
+        """
+        try:
+            return await self._request_async("GET", url)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return None
+            print(f"⚠️ Fetch for {file_path} failed: {e}")
+            raise
+        except Exception as e:
+            print(f"⚠️ Fetch for {file_path} failed: {e}")
+            raise
+
+    def get_files(self, file_paths, branch):
+        """
+        Concurrent get_file for many paths; returns {file_path: contents payload}, leaving out
+        files that do not exist on the branch.
+        """
+        async def fetch(file_path):
+            encoded_path = urllib.parse.quote(file_path, safe="")
+            url = f"{self.base_url}/repos/{self.owner}/{self.repo}/contents/{encoded_path}?ref={branch}"
+            return await self._fetch_or_none(url, file_path)
+
+        results = self._fetch_many(fetch, file_paths)
+        return {path: result for path, result in zip(file_paths, results) if result is not None}
+
     def get_file_history(self, file_path, branch):
+        mirrored = self._from_mirror(self.mirror and self.mirror.get_file_history, file_path, branch)
+        if mirrored is not None:
+            return mirrored
+
         url = f"{self.base_url}/repos/{self.owner}/{self.repo}/commits?path={file_path}&sha={branch}"
         return self._request("GET", url)
 
+    def get_file_histories(self, file_paths, branch):
+        async def fetch(file_path):
+            url = f"{self.base_url}/repos/{self.owner}/{self.repo}/commits?path={file_path}&sha={branch}"
+            return await self._fetch_or_none(url, file_path)
+
+        results = self._fetch_many(fetch, file_paths)
+        return {path: result for path, result in zip(file_paths, results) if result is not None}
+
     def get_branch_sha(self, branch):
+        mirrored = self._from_mirror(self.mirror and self.mirror.get_branch_sha, branch)
+        if mirrored is not None:
+            return mirrored
+
         url = f"{self.base_url}/repos/{self.owner}/{self.repo}/git/refs/heads/{branch}"
         return self._request("GET", url)
 
     def create_branch(self, new_branch: str, base_branch: str):
         try:
-            sha_url = f"{self.base_url}/repos/{self.owner}/{self.repo}/git/refs/heads/{base_branch}"
-            response = requests.get(sha_url, headers=self.headers)
-            response.raise_for_status()
-            base_sha = response.json()["object"]["sha"]
+            base_sha = self.get_branch_sha(base_branch)["object"]["sha"]
 
             url = f"{self.base_url}/repos/{self.owner}/{self.repo}/git/refs"
             payload = {
                 "ref": f"refs/heads/{new_branch}",
                 "sha": base_sha
             }
-            post_response = requests.post(url, headers=self.headers, json=payload)
-            post_response.raise_for_status()
-
-            return post_response.json()
+            return self._request("POST", url, json=payload)
 
-        except RequestException as e:
+        except httpx.HTTPError as e:
             print(f"[❌] create_branch failed: {str(e)}")
             raise
 
@@ -108,7 +231,7 @@ class GitHubService:
         if payload.base_sha:
             body["sha"] = payload.base_sha
 
-        r = requests.put(url, headers=self.headers, json=body)
+        r = self._send("PUT", url, json=body)
 
         if r.status_code not in [200, 201]:
             raise Exception(f"Commit failed: {r.status_code} {r.text}")
@@ -186,7 +309,7 @@ class GitHubService:
     def get_latest_file_sha(self, file_path: str, branch: str = "main") -> str:
         encoded_path = urllib.parse.quote(file_path, safe="")
         url = f"{self.base_url}/repos/{self.owner}/{self.repo}/contents/{encoded_path}?ref={branch}"
-        r = requests.get(url, headers=self.headers)
+        r = self._send("GET", url)
         if r.status_code == 200:
             return r.json()["sha"]
         raise Exception(f"Failed to fetch latest SHA: {r.status_code} {r.text}")
@@ -0,0 +1,120 @@
+import os
+import re
+import time
+import zlib
+import shutil
+import marshal
+import tempfile
+import threading
+from services.semantic_parser import PARSER_VERSION
+from services.sharded_store import ShardedFileStore
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# PARSER_VERSION is the first 12 hex digits of the parser module's SHA-1
+_VERSION_NAME = re.compile(r"[0-9a-f]{12}")
+
+
+class ParseCache(ShardedFileStore):
+    """
+    Disk cache of SemanticParser output keyed by (blob_sha, PARSER_VERSION).
+
+    Entries are marshal-encoded, zlib-compressed lists of node tuples stored as sharded files under a
+    per-version directory, evicted least-recently-used first past the byte budget. Directories
+    left by other parser versions are dropped on start-up once none of their entries has been
+    read or written for PARSE_CACHE_STALE_AFTER seconds, so a process still running the old version keeps its cache.
+    """
+
+    label = "PARSE CACHE"
+
+    def __init__(self, root=None, max_bytes=None, version=PARSER_VERSION, stale_after=None):
+        base = root or os.getenv("PARSE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "devbot_parse_cache"))
+        self.version = version
+        self.stale_after = float(stale_after if stale_after is not None else os.getenv("PARSE_CACHE_STALE_AFTER", "86400"))
+        self.hits = 0
+        self.misses = 0
+        super().__init__(
+            os.path.join(base, version),
+            max_bytes or os.getenv("PARSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024))
+        )
+        self._drop_stale_versions(base)
+
+    def _drop_stale_versions(self, base):
+        cutoff = time.time() - self.stale_after
+        for name in os.listdir(base):
+            path = os.path.join(base, name)
+            # Only directories named like a parser version; anything else under base is not ours
+            if name == self.version or not _VERSION_NAME.fullmatch(name) or not os.path.isdir(path):
+                continue
+            if _last_use(path) > cutoff:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            print(f"[PARSE CACHE] Dropped entries from parser version {name}")
+
+    def get(self, sha):
+        """
+        Returns the cached node list for a blob SHA, or None on a miss.
+        """
+        data = self._read(sha)
+        nodes = None
+        if data is not None:
+            try:
+                nodes = marshal.loads(zlib.decompress(data))
+            except (ValueError, EOFError, TypeError, zlib.error):
+                self._forget(sha)
+
+        with self._lock:
+            if nodes is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return nodes
+
+    def put(self, sha, nodes):
+        if sha in self._index:
+            return
+        self._write(sha, zlib.compress(marshal.dumps(nodes)))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self.version,
+                "entries": len(self._index),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+def _last_use(path):
+    # Reads refresh entry mtimes (see ShardedFileStore._read), so a version that is only being
+    # read by a live process still looks recent
+    latest = os.path.getmtime(path)
+    for shard in os.listdir(path):
+        shard_dir = os.path.join(path, shard)
+        if not os.path.isdir(shard_dir):
+            continue
+        with os.scandir(shard_dir) as entries:
+            for entry in entries:
+                try:
+                    latest = max(latest, entry.stat().st_mtime)
+                except FileNotFoundError:
+                    pass
+    return latest
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_parse_cache():
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_lock:
+            if _shared_cache is None:
+                _shared_cache = ParseCache()
+    return _shared_cache
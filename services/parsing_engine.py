@@ -0,0 +1,202 @@
+import os
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from services.semantic_parser import SemanticParser, SemanticNode
+from services.parse_cache import get_parse_cache
+
+_worker_parser = None
+
+
+def _parse_chunk(chunk):
+    """
+    Runs in a worker process: parses a chunk of (file_path, blob_sha, content) and returns
+    only the extracted nodes as compact tuples, never AST objects.
+    """
+    global _worker_parser
+    if _worker_parser is None:
+        _worker_parser = SemanticParser()
+    return [(file_path, blob_sha, _worker_parser.parse_compact(content)) for file_path, blob_sha, content in chunk]
+
+
+def _chunks(files, chunk_size):
+    chunk = []
+    for item in files:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _FeedStopped(Exception):
+    pass
+
+
+class ParsingEngine:
+    """
+    Fans Python files out to a ProcessPoolExecutor in chunks and streams the parsed nodes back
+    as chunks complete.
+
+    A feeder thread pulls files (and therefore performs the fetches behind them) while the
+    workers parse and the caller persists, with at most max_in_flight chunks or cache hits
+    outstanding, counting results the caller has not taken yet.
+    Blobs found in the ParseCache skip the workers entirely, and fresh results are cached
+    as they come back.
+
+    SEMANTIC_PARSE_WORKERS sets the pool size per server process; 0 or 1 parses inline on the
+    calling thread. Every web worker runs its own pool, so the default splits the CPUs across
+    WEB_CONCURRENCY processes and caps the share at DEFAULT_MAX_WORKERS.
+    """
+
+    DEFAULT_MAX_WORKERS = 4
+
+    def __init__(self, max_workers=None, chunk_size=None, max_in_flight=None, cache=None):
+        workers = os.getenv("SEMANTIC_PARSE_WORKERS")
+        self.max_workers = int(max_workers if max_workers is not None else workers if workers else self._default_workers())
+        self.chunk_size = int(chunk_size or os.getenv("SEMANTIC_PARSE_CHUNK", "32"))
+        self.max_in_flight = int(max_in_flight or self.max_workers * 2)
+        self.start_method = os.getenv("SEMANTIC_PARSE_START_METHOD", "forkserver")
+        self.parser = SemanticParser()
+        self.cache = get_parse_cache() if cache is None else cache
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def _default_workers(cls):
+        processes = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+        return max(1, min(cls.DEFAULT_MAX_WORKERS, (os.cpu_count() or 1) // processes))
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Forking a process that runs event-loop and pool threads is unsafe; start clean workers
+                method = self.start_method if self.start_method in multiprocessing.get_all_start_methods() else "spawn"
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(method)
+                )
+                print(f"[PARSING ENGINE] Started {self.max_workers} parse workers ({method})")
+            return self._executor
+
+    def _cached(self, files, on_hit):
+        """
+        Passes through files the parse cache cannot answer; hits go to on_hit instead.
+        """
+        for file_path, blob_sha, content in files:
+            nodes = self.cache.get(blob_sha) if self.cache else None
+            if nodes is None:
+                yield file_path, blob_sha, content
+            else:
+                on_hit((file_path, blob_sha, nodes))
+
+    def _store(self, rows):
+        if self.cache:
+            for _, blob_sha, nodes in rows:
+                self.cache.put(blob_sha, nodes)
+        return self._records(rows)
+
+    def _records(self, rows):
+        # Workers and the cache deal in tuples; callers get SemanticNode records
+        return [
+            (file_path, blob_sha, [SemanticNode.from_tuple(node) for node in nodes])
+            for file_path, blob_sha, nodes in rows
+        ]
+
+    def parse_stream(self, files):
+        """
+        Yields (file_path, blob_sha, nodes) for every (file_path, blob_sha, content) in files,
+        in completion order rather than input order. Cached blobs are never re-parsed.
+        """
+        if self.max_workers <= 1:
+            hits = []
+            for file_path, blob_sha, content in self._cached(files, hits.append):
+                yield from self._records(hits)
+                hits.clear()
+                yield from self._store([(file_path, blob_sha, self.parser.parse_compact(content))])
+            yield from self._records(hits)
+            return
+
+        executor = self._get_executor()
+        results = queue.Queue()
+        # A slot is held from submission (or cache hit) until the caller has taken the result,
+        # so a slow consumer stalls the feeder instead of letting results pile up
+        slots = threading.BoundedSemaphore(self.max_in_flight)
+        stop = threading.Event()
+        submitted = 0
+
+        def acquire():
+            slots.acquire()
+            if stop.is_set():
+                slots.release()
+                raise _FeedStopped()
+
+        def on_hit(row):
+            nonlocal submitted
+            acquire()
+            results.put([row])
+            submitted += 1
+
+        def feed():
+            nonlocal submitted
+            try:
+                for chunk in _chunks(self._cached(files, on_hit), self.chunk_size):
+                    acquire()
+                    executor.submit(_parse_chunk, chunk).add_done_callback(results.put)
+                    submitted += 1
+            except _FeedStopped:
+                pass
+            except BaseException as e:
+                results.put(e)
+            finally:
+                results.put(("done", submitted))
+
+        feeder = threading.Thread(target=feed, name="parse-feeder", daemon=True)
+        feeder.start()
+
+        completed = 0
+        total = None
+        try:
+            while total is None or completed < total:
+                item = results.get()
+                if isinstance(item, BaseException):
+                    raise item
+                if isinstance(item, tuple):
+                    total = item[1]
+                    continue
+                completed += 1
+                slots.release()
+                # Cache hits arrive as ready lists, parsed chunks as futures
+                yield from self._records(item) if isinstance(item, list) else self._store(item.result())
+        finally:
+            stop.set()
+            # Hand back the slots of results nobody will take so a blocked feeder can exit
+            while feeder.is_alive():
+                try:
+                    item = results.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                if not isinstance(item, (tuple, BaseException)):
+                    slots.release()
+            feeder.join()
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+
+_shared_engine = None
+_shared_lock = threading.Lock()
+
+
+def get_parsing_engine():
+    global _shared_engine
+    if _shared_engine is None:
+        with _shared_lock:
+            if _shared_engine is None:
+                _shared_engine = ParsingEngine()
+    return _shared_engine
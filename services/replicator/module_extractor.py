@@ -1,5 +1,6 @@
 import os
-import requests
+import base64
+from services.github_service import GitHubService
 
 class ModuleExtractor:
     def __init__(self):
@@ -9,17 +10,63 @@ class ModuleExtractor:
             "Authorization": f"Bearer {self.github_token}",
             "Accept": "application/vnd.github.v3+json"
         }
+        self.github = GitHubService()
         self._cache = {}
+        self._tree_cache = {}
+
+    def _tree_shas(self, owner, repo, branch):
+        key = (owner, repo, branch)
+        if key not in self._tree_cache:
+            try:
+                tree = self.github._get_repo_tree(owner, repo, branch, recursive=True)
+            except Exception as e:
+                # Fall back to per-file contents reads (e.g. branch only exists on the target)
+                print(f"[REPLICATION ERROR] Tree read failed for {owner}/{repo}@{branch}: {e}")
+                tree = {}
+            self._tree_cache[key] = {
+                entry["path"]: entry["sha"]
+                for entry in tree.get("tree", [])
+                if entry.get("type") == "blob"
+            }
+        return self._tree_cache[key]
 
     def fetch_file_content(self, owner, repo, file_path, branch):
         key = (file_path, branch)
         if key in self._cache:
             return self._cache[key]
 
+        # Resolve the blob SHA from the tree so stored blobs are never re-downloaded
+        sha = self._tree_shas(owner, repo, branch).get(file_path)
+        if sha:
+            data = self.github.get_blob(sha, owner, repo)
+            self._cache[key] = (file_path, sha, base64.b64encode(data).decode("utf-8"))
+            return self._cache[key]
+
         url = f"{self.base_url}/repos/{owner}/{repo}/contents/{file_path}?ref={branch}"
-        resp = requests.get(url, headers=self.headers)
-        resp.raise_for_status()
-        content = resp.json()["content"]
-        sha = resp.json()["sha"]
+        data = self.github._request("GET", url)
+        content = data["content"]
+        sha = data["sha"]
         self._cache[key] = (file_path, sha, content)
         return self._cache[key]
+
+    def fetch_many(self, owner, repo, file_paths, branch):
+        """
+        Batch form of fetch_file_content: one tree read, then all missing blobs fetched concurrently.
+        """
+        tree_shas = self._tree_shas(owner, repo, branch)
+        blobs = self.github.get_blobs(
+            [tree_shas[path] for path in file_paths if path in tree_shas and (path, branch) not in self._cache],
+            owner, repo
+        )
+
+        results = []
+        for path in file_paths:
+            key = (path, branch)
+            sha = tree_shas.get(path)
+            if key not in self._cache and sha in blobs:
+                self._cache[key] = (path, sha, base64.b64encode(blobs[sha]).decode("utf-8"))
+            try:
+                results.append(self.fetch_file_content(owner, repo, path, branch))
+            except Exception as e:
+                print(f"[REPLICATION ERROR] Failed to extract {path}: {e}")
+        return results
@@ -1,18 +1,33 @@
 from services.db.federation_graph_manager import FederationGraphManager
 from services.db.repo_manager import RepoManager
+from services.db.semantic_manager import SemanticManager
+from services.db.dependency_manager import DependencyManager
+from services.dependency_graph import DependencyResolver
+from services.github_service import GitHubService
 
 class ReplicationPlanBuilder:
     def __init__(self):
         self.graph_manager = FederationGraphManager()
         self.repo_manager = RepoManager()
+        self.semantic_manager = SemanticManager()
+        self.dependency_manager = DependencyManager()
+        self.github = GitHubService()
 
-    def build_plan(self, source_repo_id, target_repo_id):
+    def build_plan(self, source_repo_id, target_repo_id, source_branch="main", target_branch="main", seeds=None):
+        """
+        Without seeds, every unique module in the source graph is planned. With seeds (file paths,
+        directory prefixes or dotted module / symbol names) only their dependency closure is,
+        see _build_closure_plan.
+        """
         # 🔁 If passed as integers, resolve to logical repo_id strings
         if isinstance(source_repo_id, int):
             source_repo_id = self.repo_manager.resolve_repo_id_by_pk(source_repo_id)
         if isinstance(target_repo_id, int):
             target_repo_id = self.repo_manager.resolve_repo_id_by_pk(target_repo_id)
 
+        if seeds:
+            return self._build_closure_plan(source_repo_id, target_repo_id, seeds, source_branch, target_branch)
+
         graph = self.graph_manager.query_graph(source_repo_id)
 
         seen = set()
@@ -30,10 +45,151 @@ class ReplicationPlanBuilder:
 
         print(f"[PLAN BUILDER] Generated {len(modules)} unique modules from {len(graph)} graph nodes")
 
+        modules, diff = self._diff_against_target(modules, source_repo_id, target_repo_id, source_branch, target_branch)
+
+        return {
+            "source_repo_id": source_repo_id,
+            "target_repo_id": target_repo_id,
+            "modules": modules,
+            "diff": diff,
+            "commit_message": "",
+            "target_branch": ""
+        }
+
+    def _build_closure_plan(self, source_repo_id, target_repo_id, seeds, source_branch, target_branch):
+        """
+        Plans the minimal set of files the seeds need: the seeds plus everything they transitively
+        import, call or inherit from, per federation_edge. Modules come in topological order
+        (dependencies first) with the blob size of each file as its estimated bytes.
+
+        In `estimate`, closure_* count the whole closure before diffing against the target, while
+        files / bytes / fraction count only what is left to replicate after the diff; both
+        fractions are taken against the analyzed files of the source repo.
+        """
+        repo_pk = self.repo_manager.resolve_repo_pk(source_repo_id)
+        file_paths = list(self.semantic_manager.get_file_shas(repo_pk))
+        seed_files = self._seed_files(seeds, file_paths)
+
+        index = self.dependency_manager.get_index(repo_pk)
+        closure = index.closure(seed_files)
+        ordered, cyclic = index.topological_order(closure)
+
+        try:
+            source_tree = self._tree_entries(source_repo_id, source_branch)
+        except Exception as e:
+            print(f"[PLAN BUILDER] Source tree unavailable, sizes not estimated: {e}")
+            source_tree = {}
+
+        seed_set, cyclic_set = set(seed_files), set(cyclic)
+        modules = []
+        for position, file_path in enumerate(ordered):
+            size = source_tree.get(file_path, (None, None))[1]
+            modules.append({
+                "file_path": file_path,
+                "node_name": None,
+                "linked_to": index.dependencies(file_path),
+                "replication_strategy": "dependency_closure",
+                "order": position,
+                "seed": file_path in seed_set,
+                "cyclic": file_path in cyclic_set,
+                "estimated_bytes": size
+            })
+
+        total = len(file_paths)
+        print(f"[PLAN BUILDER] Closure of {len(seed_files)} seed files: {len(modules)} of {total} files ({len(cyclic)} in cycles)")
+
+        closure_bytes = sum(module["estimated_bytes"] or 0 for module in modules)
+        source_shas = {path: sha for path, (sha, _) in source_tree.items()} if source_tree else None
+        modules, diff = self._diff_against_target(
+            modules, source_repo_id, target_repo_id, source_branch, target_branch, source_shas
+        )
+
+        analyzed = set(file_paths)
+        repo_bytes = sum(size or 0 for path, (_, size) in source_tree.items() if path in analyzed)
+        planned_bytes = sum(module["estimated_bytes"] or 0 for module in modules)
         return {
             "source_repo_id": source_repo_id,
             "target_repo_id": target_repo_id,
+            "seeds": list(seeds),
             "modules": modules,
+            "diff": diff,
+            "estimate": {
+                "closure_files": len(ordered),
+                "closure_bytes": closure_bytes if source_tree else None,
+                "closure_fraction": round(closure_bytes / repo_bytes, 4) if repo_bytes else None,
+                "files": len(modules),
+                "bytes": planned_bytes if source_tree else None,
+                "fraction": round(planned_bytes / repo_bytes, 4) if repo_bytes else None,
+                "repo_files": total,
+                "repo_bytes": repo_bytes if source_tree else None
+            },
             "commit_message": "",
             "target_branch": ""
         }
+
+    def _seed_files(self, seeds, file_paths):
+        """
+        Expands seeds into analyzed files: an exact path, every file under a directory prefix
+        ("services/replicator/"), or the file defining a dotted module or symbol name.
+        """
+        known = set(file_paths)
+        resolver = DependencyResolver(file_paths)
+        matched, unmatched = [], []
+        for seed in seeds:
+            seed = seed.strip()
+            prefix = seed.rstrip("/") + "/"
+            if seed in known:
+                matched.append(seed)
+            elif any(path.startswith(prefix) for path in file_paths):
+                matched.extend(sorted(path for path in file_paths if path.startswith(prefix)))
+            elif resolver.resolve(seed):
+                matched.append(resolver.resolve(seed)[0])
+            else:
+                unmatched.append(seed)
+
+        if unmatched:
+            raise ValueError(f"Seeds match no analyzed file: {unmatched}")
+        return list(dict.fromkeys(matched))
+
+    def _tree_entries(self, logical_repo_id, branch):
+        owner, repo = logical_repo_id.split("/")
+        tree = self.github._get_repo_tree(owner, repo, branch, recursive=True)
+        return {
+            entry["path"]: (entry["sha"], entry.get("size"))
+            for entry in tree.get("tree", [])
+            if entry.get("type") == "blob"
+        }
+
+    def _blob_shas(self, logical_repo_id, branch):
+        return {path: sha for path, (sha, _) in self._tree_entries(logical_repo_id, branch).items()}
+
+    def _diff_against_target(self, modules, source_repo_id, target_repo_id, source_branch, target_branch, source_shas=None):
+        """
+        Compares source and target trees by blob SHA and drops modules whose file the target already holds.
+        """
+        try:
+            source_shas = source_shas or self._blob_shas(source_repo_id, source_branch)
+            target_shas = self._blob_shas(target_repo_id, target_branch)
+        except Exception as e:
+            print(f"[PLAN BUILDER] Tree diff skipped, replicating all modules: {e}")
+            return modules, None
+
+        status = {}
+        for file_path in {m["file_path"] for m in modules}:
+            source_sha = source_shas.get(file_path)
+            if source_sha is None:
+                status[file_path] = "missing_in_source"
+            elif file_path not in target_shas:
+                status[file_path] = "added"
+            elif target_shas[file_path] != source_sha:
+                status[file_path] = "changed"
+            else:
+                status[file_path] = "unchanged"
+
+        diff = {"added": 0, "changed": 0, "unchanged": 0, "missing_in_source": 0}
+        for file_status in status.values():
+            diff[file_status] += 1
+
+        kept = [m for m in modules if status[m["file_path"]] in ("added", "changed")]
+        print(f"[PLAN BUILDER] Tree diff: {diff}; {len(kept)} of {len(modules)} modules need replication")
+        return kept, diff
@@ -1,33 +1,221 @@
 import ast
+import hashlib
+
+# Any edit to this module changes the version, so cached parse results from older logic are never reused
+with open(__file__, "rb") as _source:
+    PARSER_VERSION = hashlib.sha1(_source.read()).hexdigest()[:12]
+
+
+class SemanticNode:
+    """
+    One extracted definition or import. Slotted rather than a dict to keep per-node memory
+    small; `get` / item access keep it usable wherever the old node dicts were.
+    """
+
+    FIELDS = (
+        "node_type", "name", "qualname", "lineno", "end_lineno", "args", "docstring",
+        "methods", "inherits_from", "decorators", "is_async", "calls"
+    )
+    __slots__ = FIELDS + ("file_path",)
+
+    def __init__(self, node_type, name, qualname=None, lineno=None, end_lineno=None, args=None, docstring=None,
+                 methods=None, inherits_from=None, decorators=None, is_async=False, calls=None, file_path=None):
+        self.node_type = node_type
+        self.name = name
+        self.qualname = qualname or name
+        self.lineno = lineno
+        self.end_lineno = end_lineno
+        self.args = args
+        self.docstring = docstring
+        self.methods = methods
+        self.inherits_from = inherits_from
+        self.decorators = decorators
+        self.is_async = is_async
+        self.calls = calls
+        self.file_path = file_path
+
+    def as_tuple(self):
+        """
+        Compact, marshal-friendly form used between parse workers and in the parse cache.
+        """
+        return tuple(getattr(self, field) for field in self.FIELDS)
+
+    @classmethod
+    def from_tuple(cls, values):
+        return cls(*values)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+
+
+def _dotted(expr):
+    """
+    "a.b.c" for Name / Attribute chains, None for anything else (subscripts, call results, ...).
+    """
+    parts = []
+    while isinstance(expr, ast.Attribute):
+        parts.append(expr.attr)
+        expr = expr.value
+    if not isinstance(expr, ast.Name):
+        return None
+    parts.append(expr.id)
+    return ".".join(reversed(parts))
+
+
+def _decorator_name(decorator):
+    # "@router.get('/x')" is recorded as "router.get"
+    return _dotted(decorator.func if isinstance(decorator, ast.Call) else decorator)
+
+
+def _arg_names(arguments):
+    names = [arg.arg for arg in arguments.posonlyargs + arguments.args]
+    if arguments.vararg:
+        names.append(f"*{arguments.vararg.arg}")
+    names.extend(arg.arg for arg in arguments.kwonlyargs)
+    if arguments.kwarg:
+        names.append(f"**{arguments.kwarg.arg}")
+    return tuple(names)
+
+
+# Subtrees that can never hold a definition, import or call
+_LEAF_TYPES = (ast.expr_context, ast.Name, ast.Constant, ast.operator, ast.cmpop, ast.unaryop, ast.boolop)
+
+
+class _SemanticVisitor(ast.NodeVisitor):
+    """
+    Single pass over a module: each definition is recorded once, with its qualified name,
+    and calls are attributed to the innermost enclosing function.
+
+    Dispatch goes through a per-type table and leaf nodes are never descended into, which
+    keeps the pass cheaper than NodeVisitor's name-based lookup on every node.
+    """
+
+    def __init__(self):
+        self.nodes = []
+        self._scope = []
+        self._in_class = [False]
+        self._functions = []
+        self._handlers = {
+            ast.ClassDef: self.visit_ClassDef,
+            ast.FunctionDef: self.visit_FunctionDef,
+            ast.AsyncFunctionDef: self.visit_AsyncFunctionDef,
+            ast.Call: self.visit_Call,
+            ast.Import: self.visit_Import,
+            ast.ImportFrom: self.visit_ImportFrom
+        }
+
+    def visit(self, node):
+        handler = self._handlers.get(type(node))
+        if handler is None:
+            self.generic_visit(node)
+        else:
+            handler(node)
+
+    def generic_visit(self, node):
+        visit = self.visit
+        for field in node._fields:
+            value = getattr(node, field, None)
+            if isinstance(value, list):
+                for item in value:
+                    if isinstance(item, ast.AST) and not isinstance(item, _LEAF_TYPES):
+                        visit(item)
+            elif isinstance(value, ast.AST) and not isinstance(value, _LEAF_TYPES):
+                visit(value)
+
+    def _enter(self, node, record, is_class, outer, calls=None):
+        # Decorators, bases, defaults and annotations are evaluated in the enclosing scope
+        for item in outer:
+            if item is not None and not isinstance(item, _LEAF_TYPES):
+                self.visit(item)
+
+        self.nodes.append(record)
+        self._scope.append(node.name)
+        self._in_class.append(is_class)
+        if calls is not None:
+            self._functions.append(calls)
+        for item in node.body:
+            self.visit(item)
+        if calls is not None:
+            self._functions.pop()
+        self._in_class.pop()
+        self._scope.pop()
+
+    def visit_ClassDef(self, node):
+        record = SemanticNode(
+            "class", node.name, ".".join(self._scope + [node.name]), node.lineno, node.end_lineno,
+            docstring=ast.get_docstring(node),
+            methods=tuple(item.name for item in node.body if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))),
+            inherits_from=tuple(base for base in map(_dotted, node.bases) if base),
+            decorators=tuple(decorator for decorator in map(_decorator_name, node.decorator_list) if decorator)
+        )
+        self._enter(node, record, True, node.decorator_list + node.bases + node.keywords)
+
+    def _visit_function(self, node, is_async):
+        record = SemanticNode(
+            "method" if self._in_class[-1] else "function", node.name, ".".join(self._scope + [node.name]),
+            node.lineno, node.end_lineno,
+            args=_arg_names(node.args),
+            docstring=ast.get_docstring(node),
+            decorators=tuple(decorator for decorator in map(_decorator_name, node.decorator_list) if decorator),
+            is_async=is_async
+        )
+        calls = {}
+        self._enter(node, record, False, node.decorator_list + [node.args, node.returns], calls)
+        record.calls = tuple(calls)
+
+    def visit_FunctionDef(self, node):
+        self._visit_function(node, is_async=False)
+
+    def visit_AsyncFunctionDef(self, node):
+        self._visit_function(node, is_async=True)
+
+    def visit_Call(self, node):
+        if self._functions:
+            target = _dotted(node.func)
+            if target:
+                # dict keeps first-seen order while de-duplicating
+                self._functions[-1][target] = None
+        self.generic_visit(node)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.nodes.append(SemanticNode(
+                "import", alias.name, alias.asname or alias.name.split(".")[0], node.lineno, node.end_lineno
+            ))
+
+    def visit_ImportFrom(self, node):
+        module = "." * node.level + (node.module or "")
+        for alias in node.names:
+            target = f"{module}{alias.name}" if module.endswith(".") or not module else f"{module}.{alias.name}"
+            self.nodes.append(SemanticNode(
+                "import", target, alias.asname or alias.name, node.lineno, node.end_lineno
+            ))
+
 
 class SemanticParser:
 
-    def parse_python_file(self, file_content):
-        semantic_nodes = []
+    def parse_records(self, file_content):
         try:
             tree = ast.parse(file_content)
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    semantic_nodes.append({
-                        "node_type": "function",
-                        "name": node.name,
-                        "args": [arg.arg for arg in node.args.args],
-                        "docstring": ast.get_docstring(node)
-                    })
-                elif isinstance(node, ast.ClassDef):
-                    methods = []
-                    for body_item in node.body:
-                        if isinstance(body_item, ast.FunctionDef):
-                            methods.append(body_item.name)
-                    inherits = [base.id for base in node.bases if hasattr(base, 'id')]
-                    semantic_nodes.append({
-                        "node_type": "class",
-                        "name": node.name,
-                        "methods": methods,
-                        "inherits_from": inherits,
-                        "docstring": ast.get_docstring(node)
-                    })
         except Exception as e:
             print(f"[ERROR] Semantic parsing failed: {str(e)}")
+            return []
+
+        visitor = _SemanticVisitor()
+        visitor.visit(tree)
+        return visitor.nodes
 
-        return semantic_nodes
+    def parse_compact(self, file_content):
+        return [record.as_tuple() for record in self.parse_records(file_content)]
+
+    def parse_python_file(self, file_content):
+        return [record.to_dict() for record in self.parse_records(file_content)]
@@ -0,0 +1,120 @@
+import os
+import mmap
+import tempfile
+import threading
+
+
+class ShardedFileStore:
+    """
+    Directory of files keyed by hex digest, sharded by the first two characters (`ab/cdef...`)
+    and evicted least-recently-used first once the total size passes max_bytes.
+
+    Writes go through a temp file unique across processes and an atomic rename, reads go
+    through mmap and refresh the entry's mtime, which is what eviction orders by. Subclasses
+    encode and decode the bytes.
+    """
+
+    label = "SHARDED STORE"
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._index = {}
+        self._size = 0
+
+        os.makedirs(self.root, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        for shard in os.listdir(self.root):
+            shard_dir = os.path.join(self.root, shard)
+            if len(shard) != 2 or not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if name.endswith(".tmp"):
+                    continue
+                stat = os.stat(os.path.join(shard_dir, name))
+                self._index[shard + name] = (stat.st_size, stat.st_mtime)
+                self._size += stat.st_size
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key[2:])
+
+    def has(self, key):
+        return key in self._index
+
+    def _read(self, key):
+        """
+        Raw bytes stored under key, or None when it is not stored.
+        """
+        if key not in self._index:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                if self._index[key][0] == 0:
+                    data = b""
+                else:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        data = mapped[:]
+            os.utime(path)
+            mtime = os.path.getmtime(path)
+        except (OSError, KeyError, ValueError):
+            self._forget(key)
+            return None
+
+        with self._lock:
+            if key in self._index:
+                self._index[key] = (len(data), mtime)
+        return data
+
+    def _write(self, key, data):
+        if key in self._index:
+            return
+
+        path = self._path(key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Several processes may share the directory, so the temp name must be unique across them
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            mtime = os.path.getmtime(path)
+        except FileNotFoundError:
+            # Another process evicted the entry (or swept our temp file) meanwhile; the
+            # content is keyed by digest, so there is nothing to redo
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            if key not in self._index:
+                self._index[key] = (len(data), mtime)
+                self._size += len(data)
+        self._evict()
+
+    def _forget(self, key):
+        with self._lock:
+            entry = self._index.pop(key, None)
+            if entry:
+                self._size -= entry[0]
+
+    def _evict(self):
+        if self._size <= self.max_bytes:
+            return
+
+        with self._lock:
+            by_age = sorted(self._index.items(), key=lambda item: item[1][1])
+            for key, (size, _) in by_age:
+                if self._size <= self.max_bytes:
+                    break
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+                del self._index[key]
+                self._size -= size
+        print(f"[{self.label}] Evicted down to {self._size} bytes")
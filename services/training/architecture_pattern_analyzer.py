@@ -4,17 +4,24 @@ class ArchitecturePatternAnalyzer:
     def analyze_graph(self, graph_data):
         pattern_clusters = defaultdict(list)
 
-        for node in graph_data:
+        for functional_area, example in self.iter_patterns(graph_data):
+            pattern_clusters[functional_area].append(example)
+
+        return dict(pattern_clusters)
+
+    def iter_patterns(self, graph_rows):
+        """
+        Streaming form of analyze_graph: yields (functional_area, example) per graph row.
+        """
+        for node in graph_rows:
             functional_area = self.infer_function_area(node["name"], node["file_path"])
-            pattern_clusters[functional_area].append({
+            yield functional_area, {
                 "repo": node["repo_id"],
                 "file_path": node["file_path"],
                 "function": node["name"],
                 "linked_to": node["cross_linked_to"],
                 "notes": node["notes"]
-            })
-
-        return dict(pattern_clusters)
+            }
 
     def infer_function_area(self, name, file_path):
         # EXTREMELY simple initial categorizer (GPT agents will refine)
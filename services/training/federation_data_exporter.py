@@ -1,8 +1,18 @@
 from services.db.federation_graph_manager import FederationGraphManager
 
+# Columns the training pipeline reads; everything else stays in Postgres
+EXPORT_COLUMNS = ["id", "repo_id", "file_path", "name", "cross_linked_to", "notes"]
+
+
 class FederationDataExporter:
     def __init__(self):
         self.graph_manager = FederationGraphManager()
 
+    def iter_full_graph(self, batch_size=2000):
+        """
+        Streams the whole federation graph; only batch_size rows are held in memory at once.
+        """
+        return self.graph_manager.iter_full_graph(columns=EXPORT_COLUMNS, batch_size=batch_size)
+
     def export_full_graph(self):
-        return self.graph_manager.query_graph()
+        return list(self.iter_full_graph())
@@ -1,24 +1,82 @@
+import os
+import gzip
 import json
 
 class TrainingPayloadGenerator:
     def generate_payload(self, pattern_data):
-        payloads = []
+        patterns = ((module, item) for module, examples in pattern_data.items() for item in examples)
+        return list(self.iter_payloads(patterns))
 
-        for module, examples in pattern_data.items():
-            for item in examples:
-                prompt = f"Replicate {module} functionality for SaaS kernel.\n"
-                prompt += f"Source Repo: {item['repo']}, File: {item['file_path']}\n"
-                prompt += f"Function: {item['function']}\nNotes: {item['notes']}\n"
+    def iter_payloads(self, patterns):
+        """
+        Streaming form of generate_payload over (module, example) pairs.
+        """
+        for module, item in patterns:
+            prompt = f"Replicate {module} functionality for SaaS kernel.\n"
+            prompt += f"Source Repo: {item['repo']}, File: {item['file_path']}\n"
+            prompt += f"Function: {item['function']}\nNotes: {item['notes']}\n"
 
-                payload = {
-                    "prompt": prompt,
-                    "completion": f"Implement {item['function']} into target SaaS Kernel system."
-                }
-                payloads.append(payload)
-
-        return payloads
+            yield {
+                "prompt": prompt,
+                "completion": f"Implement {item['function']} into target SaaS Kernel system."
+            }
 
     def save_to_jsonl(self, payloads, output_path):
         with open(output_path, 'w') as f:
             for item in payloads:
                 f.write(json.dumps(item) + '\n')
+
+    def save_to_jsonl_shards(self, payloads, output_dir, shard_size=None, prefix="training_dataset"):
+        """
+        Writes payloads as gzip-compressed JSONL shards of at most shard_size lines each.
+
+        Every shard is written under a .tmp name and the whole set is renamed into place only
+        once the export has finished, so a failed run leaves the previous shards untouched.
+        An empty export keeps the previous shards too. Returns {"shards": [paths], "payloads": count}.
+        """
+        shard_size = int(shard_size or os.getenv("TRAINING_SHARD_SIZE", "50000"))
+        os.makedirs(output_dir, exist_ok=True)
+
+        shards = []
+        written = 0
+        shard = None
+        complete = False
+        try:
+            for item in payloads:
+                if shard is None:
+                    shards.append(os.path.join(output_dir, f"{prefix}-{len(shards):05d}.jsonl.gz"))
+                    shard = gzip.open(shards[-1] + ".tmp", "wt", encoding="utf-8")
+                shard.write(json.dumps(item) + '\n')
+                written += 1
+
+                if written % shard_size == 0:
+                    shard.close()
+                    shard = None
+
+            if shard is not None:
+                shard.close()
+                shard = None
+            complete = True
+        finally:
+            if shard is not None:
+                shard.close()
+            if not complete:
+                for shard_path in shards:
+                    if os.path.exists(shard_path + ".tmp"):
+                        os.remove(shard_path + ".tmp")
+
+        if not shards:
+            print(f"⚠️ [TRAINING EXPORT] No payloads to export, keeping existing shards in {output_dir}")
+            return {"shards": [], "payloads": 0}
+
+        for shard_path in shards:
+            os.replace(shard_path + ".tmp", shard_path)
+
+        # Drop higher-numbered shards left over from a larger previous export
+        for name in os.listdir(output_dir):
+            path = os.path.join(output_dir, name)
+            if name.startswith(f"{prefix}-") and name.endswith(".jsonl.gz") and path not in shards:
+                os.remove(path)
+
+        print(f"[TRAINING EXPORT] Wrote {written} payloads to {len(shards)} shards in {output_dir}")
+        return {"shards": shards, "payloads": written}
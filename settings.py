@@ -1,26 +1,153 @@
 import os
 import time
+import itertools
+import threading
+import contextvars
 import psycopg2
-from psycopg2.pool import SimpleConnectionPool
+import psycopg2.extensions
+from psycopg2.pool import ThreadedConnectionPool
+from psycopg_pool import AsyncConnectionPool
+from psycopg_pool import PoolTimeout as AsyncPoolTimeout
+from contextlib import asynccontextmanager, AsyncExitStack
 from dotenv import load_dotenv
 
 load_dotenv()
 
+class PoolTimeout(Exception):
+    pass
+
+
+# Set once the current request/task has used the primary, so its later reads see its own writes
+_primary_pinned = contextvars.ContextVar("db_primary_pinned", default=False)
+
+def pin_primary():
+    _primary_pinned.set(True)
+
+def primary_pinned():
+    return _primary_pinned.get()
+
+
+# 0 on a primary or a fully caught-up standby, otherwise seconds since the last replayed transaction
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def load_replica_urls():
+    return [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+
+
+class ReplicaHealth:
+    """
+    Lag / availability bookkeeping for one replica, shared by the sync and async routers.
+    Request threads and the event loop both touch it, so every field is guarded by a lock.
+    """
+
+    def __init__(self, name, max_lag=None, check_interval=None, retry_after=None):
+        self.name = name
+        self.max_lag = float(max_lag or os.getenv("DB_REPLICA_MAX_LAG", "5"))
+        self.check_interval = float(check_interval or os.getenv("DB_REPLICA_LAG_CHECK", "10"))
+        self.retry_after = float(retry_after or os.getenv("DB_REPLICA_RETRY_AFTER", "30"))
+        self.lag = None
+        self.checked_at = 0.0
+        self.unavailable_until = 0.0
+        self.reads = 0
+        self._lock = threading.Lock()
+
+    def usable(self, now):
+        with self._lock:
+            if now < self.unavailable_until:
+                return False
+            # A lagging replica is retried once its next lag check is due
+            return self.lag is None or self.lag <= self.max_lag or now - self.checked_at >= self.check_interval
+
+    def check_due(self, now):
+        with self._lock:
+            return now - self.checked_at >= self.check_interval
+
+    def record_lag(self, lag, now):
+        with self._lock:
+            self.lag = float(lag)
+            self.checked_at = now
+            healthy = self.lag <= self.max_lag
+        if not healthy:
+            print(f"⚠️ [REPLICA] {self.name} lagging {float(lag):.1f}s, reads fall back")
+        return healthy
+
+    def mark_unavailable(self, error, now):
+        with self._lock:
+            self.unavailable_until = now + self.retry_after
+        print(f"⚠️ [REPLICA] {self.name} unavailable, retrying in {self.retry_after:.0f}s: {error}")
+
+    def record_read(self):
+        with self._lock:
+            self.reads += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {"lag": self.lag, "max_lag": self.max_lag, "available": time.monotonic() >= self.unavailable_until, "reads": self.reads}
+
+
+def pool_budget(kind):
+    """
+    Max connections for the "sync" or "async" pool of one process. DB_POOL_MAX is the
+    per-process total, split between the two unless DB_POOL_SYNC_MAX / DB_POOL_ASYNC_MAX
+    set a side explicitly.
+    """
+    explicit = os.getenv(f"DB_POOL_{kind.upper()}_MAX")
+    if explicit:
+        return int(explicit)
+    total = int(os.getenv("DB_POOL_MAX", "10"))
+    sync_share = max(1, total // 2)
+    return sync_share if kind == "sync" else max(1, total - sync_share)
+
+
 class Database:
-    def __init__(self, retries=5, delay=2):
-        self.dsn = os.getenv("DATABASE_URL")
+    """
+    Thread-safe Postgres connection pool shared by every manager in the process.
+
+    Checkouts block for up to DB_POOL_TIMEOUT seconds instead of failing when the pool
+    is exhausted, connections idle for longer than DB_POOL_HEALTHCHECK_IDLE are pinged
+    before being handed out, and wait / in-use / checkout-duration metrics are tracked.
+    """
+
+    def __init__(self, retries=5, delay=2, minconn=None, maxconn=None, checkout_timeout=None, dsn=None, role="primary"):
+        self.dsn = dsn or os.getenv("DATABASE_URL")
+        self.role = role
+        self.minconn = int(minconn or os.getenv("DB_POOL_MIN", "1"))
+        self.maxconn = int(maxconn or pool_budget("sync"))
+        self.minconn = min(self.minconn, self.maxconn)
+        self.checkout_timeout = float(checkout_timeout or os.getenv("DB_POOL_TIMEOUT", "10"))
+        self.healthcheck_idle = float(os.getenv("DB_POOL_HEALTHCHECK_IDLE", "30"))
         self.pool = None
+        self._slots = threading.BoundedSemaphore(self.maxconn)
+        self._lock = threading.Lock()
+        self._checked_out = {}
+        self._last_used = {}
+        self._metrics = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "discarded": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "checkout_seconds_total": 0.0,
+            "checkout_seconds_max": 0.0
+        }
         attempt = 0
 
         while attempt < retries:
             try:
-                self.pool = SimpleConnectionPool(
-                    minconn=1,
-                    maxconn=5,
+                self.pool = ThreadedConnectionPool(
+                    minconn=self.minconn,
+                    maxconn=self.maxconn,
                     dsn=self.dsn
                 )
                 if self.pool:
-                    print("✅ Connection pool established")
+                    print(f"✅ Connection pool established (min={self.minconn}, max={self.maxconn})")
                     break
             except psycopg2.OperationalError as e:
                 print(f"DB connection pool failed (attempt {attempt+1}): {e}")
@@ -30,15 +157,361 @@ class Database:
         if not self.pool:
             raise Exception("Database connection pool failed after retries.")
 
-    def get_connection(self):
-        return self.pool.getconn()
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        if time.monotonic() - self._last_used.get(id(conn), 0) < self.healthcheck_idle:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def get_connection(self, timeout=None, read_only=False):
+        if self.role == "primary" and not read_only:
+            pin_primary()
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.checkout_timeout if timeout is None else timeout):
+            with self._lock:
+                self._metrics["timeouts"] += 1
+            raise PoolTimeout(f"No database connection available within {self.checkout_timeout}s")
+
+        try:
+            conn = self.pool.getconn()
+            while not self._is_healthy(conn):
+                print("⚠️ [POOL] Discarding broken connection")
+                self.pool.putconn(conn, close=True)
+                with self._lock:
+                    self._metrics["discarded"] += 1
+                conn = self.pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+        now = time.monotonic()
+        waited = now - started
+        with self._lock:
+            self._checked_out[id(conn)] = now
+            self._metrics["checkouts"] += 1
+            self._metrics["wait_seconds_total"] += waited
+            self._metrics["wait_seconds_max"] = max(self._metrics["wait_seconds_max"], waited)
+        return conn
 
     def release_connection(self, conn):
-        if conn:
-            self.pool.putconn(conn)
-        else:
+        if not conn:
             print("⚠️ [POOL] Attempted to release a null connection")
+            return
+
+        with self._lock:
+            checked_out_at = self._checked_out.pop(id(conn), None)
+            if checked_out_at is not None:
+                held = time.monotonic() - checked_out_at
+                self._metrics["checkout_seconds_total"] += held
+                self._metrics["checkout_seconds_max"] = max(self._metrics["checkout_seconds_max"], held)
+            self._last_used[id(conn)] = time.monotonic()
+
+        broken = bool(conn.closed)
+        try:
+            # Never hand the next caller a connection with a half-finished transaction
+            if not broken and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except Exception as e:
+            print(f"⚠️ [POOL] Rollback on release failed, closing connection: {e}")
+            broken = True
+        finally:
+            try:
+                # Always return the connection, so the pool and the slot semaphore stay in step
+                self.pool.putconn(conn, close=broken or bool(conn.closed))
+            finally:
+                if checked_out_at is not None:
+                    self._slots.release()
+
+    def metrics(self):
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics["in_use"] = len(self._checked_out)
+            metrics["max_size"] = self.maxconn
+            metrics["min_size"] = self.minconn
+        checkouts = metrics["checkouts"] or 1
+        metrics["wait_seconds_avg"] = metrics["wait_seconds_total"] / checkouts
+        metrics["checkout_seconds_avg"] = metrics["checkout_seconds_total"] / checkouts
+        return metrics
 
     def close_all(self):
         print("🛑 [POOL] Closing all connections")
         self.pool.closeall()
+
+
+_shared_database = None
+_shared_lock = threading.Lock()
+
+def get_database():
+    """
+    Process-wide Database; every manager and service should share this one pool.
+    """
+    global _shared_database
+    if _shared_database is None:
+        with _shared_lock:
+            if _shared_database is None:
+                _shared_database = Database()
+    return _shared_database
+
+
+class ReadRouter:
+    """
+    Routes read-only checkouts to the DATABASE_REPLICA_URLS pools, round-robin over replicas
+    whose lag is within DB_REPLICA_MAX_LAG. Falls back to the primary when no replica is
+    usable or when the current request has already used the primary (read-your-writes).
+    Exposes the same get_connection / release_connection interface as Database.
+    """
+
+    def __init__(self, primary=None, replica_urls=None):
+        self.primary = primary or get_database()
+        self.replicas = []
+        for index, url in enumerate(load_replica_urls() if replica_urls is None else replica_urls):
+            name = f"replica-{index}"
+            try:
+                pool = Database(retries=1, dsn=url, role="replica", maxconn=os.getenv("DB_REPLICA_POOL_MAX"))
+                self.replicas.append((pool, ReplicaHealth(name)))
+            except Exception as e:
+                print(f"⚠️ [REPLICA] {name} skipped: {e}")
+        self.replica_timeout = float(os.getenv("DB_REPLICA_TIMEOUT", "1"))
+        self._order = itertools.count()
+        self._owners = {}
+        self._lock = threading.Lock()
+        self.primary_reads = 0
+
+    def _candidates(self):
+        if not self.replicas:
+            return []
+        start = next(self._order) % len(self.replicas)
+        return self.replicas[start:] + self.replicas[:start]
+
+    def get_connection(self, timeout=None):
+        if not primary_pinned():
+            for pool, health in self._candidates():
+                now = time.monotonic()
+                if not health.usable(now):
+                    continue
+                try:
+                    conn = pool.get_connection(timeout=self.replica_timeout)
+                except PoolTimeout:
+                    # Saturated, not broken; try the next replica
+                    continue
+                except Exception as e:
+                    health.mark_unavailable(e, now)
+                    continue
+                try:
+                    if health.check_due(now):
+                        with conn.cursor() as cur:
+                            cur.execute(REPLICA_LAG_QUERY)
+                            lag = cur.fetchone()[0]
+                        conn.rollback()
+                        if not health.record_lag(lag, now):
+                            pool.release_connection(conn)
+                            continue
+                except Exception as e:
+                    pool.release_connection(conn)
+                    health.mark_unavailable(e, now)
+                    continue
+
+                with self._lock:
+                    self._owners[id(conn)] = pool
+                    health.record_read()
+                return conn
+
+        conn = self.primary.get_connection(timeout=timeout, read_only=True)
+        with self._lock:
+            self._owners[id(conn)] = self.primary
+            self.primary_reads += 1
+        return conn
+
+    def release_connection(self, conn):
+        with self._lock:
+            pool = self._owners.pop(id(conn), self.primary)
+        pool.release_connection(conn)
+
+    def metrics(self):
+        return {
+            "primary_reads": self.primary_reads,
+            "replicas": {health.name: dict(health.snapshot(), pool=pool.metrics()) for pool, health in self.replicas}
+        }
+
+    def close_all(self):
+        for pool, _ in self.replicas:
+            pool.close_all()
+
+
+_shared_read_router = None
+
+def get_read_database():
+    """
+    Process-wide ReadRouter for query-only paths; equivalent to the primary when no replicas are configured.
+    """
+    global _shared_read_router
+    if _shared_read_router is None:
+        primary = get_database()
+        with _shared_lock:
+            if _shared_read_router is None:
+                _shared_read_router = ReadRouter(primary)
+    return _shared_read_router
+
+
+class AsyncDatabase:
+    """
+    Async counterpart of Database for `async def` routes, backed by a psycopg 3
+    AsyncConnectionPool so queries never block the event loop.
+    """
+
+    def __init__(self, min_size=None, max_size=None, checkout_timeout=None, dsn=None, role="primary", open_timeout=30):
+        self.dsn = dsn or os.getenv("DATABASE_URL")
+        self.role = role
+        self.min_size = int(min_size or os.getenv("DB_POOL_MIN", "1"))
+        self.max_size = int(max_size or pool_budget("async"))
+        self.min_size = min(self.min_size, self.max_size)
+        self.checkout_timeout = float(checkout_timeout or os.getenv("DB_POOL_TIMEOUT", "10"))
+        self.open_timeout = float(open_timeout)
+        self.pool = self._create_pool()
+        self._opened = False
+
+    def _create_pool(self):
+        return AsyncConnectionPool(
+            conninfo=self.dsn,
+            min_size=self.min_size,
+            max_size=self.max_size,
+            timeout=self.checkout_timeout,
+            check=AsyncConnectionPool.check_connection,
+            open=False
+        )
+
+    async def open(self):
+        if not self._opened:
+            try:
+                await self.pool.open(wait=True, timeout=self.open_timeout)
+            except Exception:
+                # A pool whose first open failed is closed for good; start from a fresh one next time
+                self.pool = self._create_pool()
+                raise
+            self._opened = True
+            print(f"✅ Async connection pool established ({self.role}, min={self.min_size}, max={self.max_size})")
+
+    @asynccontextmanager
+    async def connection(self, read_only=False, timeout=None):
+        """
+        Yields a pooled connection; the transaction commits on exit and rolls back on error.
+        """
+        if self.role == "primary" and not read_only:
+            pin_primary()
+        await self.open()
+        async with self.pool.connection(timeout=timeout) as conn:
+            yield conn
+
+    def metrics(self):
+        return self.pool.get_stats()
+
+    async def close_all(self):
+        if self._opened:
+            print("🛑 [ASYNC POOL] Closing all connections")
+            await self.pool.close()
+            self._opened = False
+
+
+_shared_async_database = None
+
+def get_async_database():
+    """
+    Process-wide AsyncDatabase; opened lazily on first use inside the running event loop.
+    """
+    global _shared_async_database
+    if _shared_async_database is None:
+        with _shared_lock:
+            if _shared_async_database is None:
+                _shared_async_database = AsyncDatabase()
+    return _shared_async_database
+
+
+class AsyncReadRouter:
+    """
+    Async counterpart of ReadRouter: `async with router.connection()` yields a replica
+    connection when one is usable and the current task has not used the primary.
+    """
+
+    def __init__(self, primary=None, replica_urls=None):
+        self.primary = primary or get_async_database()
+        self.replica_timeout = float(os.getenv("DB_REPLICA_TIMEOUT", "1"))
+        self.replicas = [
+            (AsyncDatabase(dsn=url, role="replica", max_size=os.getenv("DB_REPLICA_POOL_MAX"), open_timeout=self.replica_timeout),
+             ReplicaHealth(f"replica-{index}"))
+            for index, url in enumerate(load_replica_urls() if replica_urls is None else replica_urls)
+        ]
+        self._order = itertools.count()
+        self.primary_reads = 0
+
+    async def _replica_connection(self, stack):
+        start = next(self._order) % len(self.replicas)
+        for pool, health in self.replicas[start:] + self.replicas[:start]:
+            now = time.monotonic()
+            if not health.usable(now):
+                continue
+            try:
+                conn = await stack.enter_async_context(pool.connection(timeout=self.replica_timeout))
+            except AsyncPoolTimeout as e:
+                # Saturated replicas are skipped; ones with no live connections are benched
+                if pool._opened and pool.metrics().get("pool_size", 0):
+                    continue
+                health.mark_unavailable(e, now)
+                continue
+            except Exception as e:
+                health.mark_unavailable(e, now)
+                continue
+            try:
+                if health.check_due(now):
+                    cur = await conn.execute(REPLICA_LAG_QUERY)
+                    lag = (await cur.fetchone())[0]
+                    if not health.record_lag(lag, now):
+                        # Hand this connection back before trying the next replica
+                        await stack.aclose()
+                        continue
+            except Exception as e:
+                await stack.aclose()
+                health.mark_unavailable(e, now)
+                continue
+            health.record_read()
+            return conn
+        return None
+
+    @asynccontextmanager
+    async def connection(self):
+        conn = None
+        async with AsyncExitStack() as stack:
+            if self.replicas and not primary_pinned():
+                conn = await self._replica_connection(stack)
+            if conn is None:
+                self.primary_reads += 1
+                conn = await stack.enter_async_context(self.primary.connection(read_only=True))
+            yield conn
+
+    def metrics(self):
+        return {
+            "primary_reads": self.primary_reads,
+            "replicas": {health.name: dict(health.snapshot(), pool=pool.metrics()) for pool, health in self.replicas}
+        }
+
+    async def close_all(self):
+        for pool, _ in self.replicas:
+            await pool.close_all()
+
+
+_shared_async_read_router = None
+
+def get_async_read_database():
+    global _shared_async_read_router
+    if _shared_async_read_router is None:
+        primary = get_async_database()
+        with _shared_lock:
+            if _shared_async_read_router is None:
+                _shared_async_read_router = AsyncReadRouter(primary)
+    return _shared_async_read_router
@@ -0,0 +1,65 @@
+import io
+import asyncio
+import tarfile
+import hashlib
+from types import SimpleNamespace
+from services.archive_ingestor import ArchiveIngestor
+from services.blob_store import BlobStore
+from services.github_scheduler import FetchScheduler, TokenPool
+
+
+def build_tarball(files, top="owner-repo-abc123"):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        directory = tarfile.TarInfo(top)
+        directory.type = tarfile.DIRTYPE
+        archive.addfile(directory)
+        for path, data in files.items():
+            info = tarfile.TarInfo(f"{top}/{path}")
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    buffer.seek(0)
+    return buffer
+
+
+def git_blob_sha(data):
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def test_iter_files_strips_top_directory_and_hashes_blobs(tmp_path):
+    files = {
+        "main.py": b"print('hi')\n",
+        "pkg/__init__.py": b"",
+        "pkg/mod.py": "café = 1\n".encode("utf-8"),
+        "README.md": b"# not python\n"
+    }
+    ingestor = ArchiveIngestor()
+    ingestor.blob_store = BlobStore(root=str(tmp_path))
+
+    results = {path: (sha, data) for path, sha, data in ingestor.iter_files(build_tarball(files))}
+
+    assert sorted(results) == ["main.py", "pkg/__init__.py", "pkg/mod.py"]
+    for path, (sha, data) in results.items():
+        assert data == files[path]
+        assert sha == git_blob_sha(files[path])
+        assert ingestor.blob_store.get(sha) == files[path]
+
+
+def test_open_stream_uses_pooled_token_and_records_rate_limit():
+    sent = []
+
+    class FakeClient:
+        async def _open_stream(self, method, url, headers=None, on_response=None, **kwargs):
+            sent.append(headers["Authorization"])
+            response = SimpleNamespace(status_code=200, headers={"X-RateLimit-Remaining": "7", "X-RateLimit-Reset": "0"})
+            on_response(response)
+            return response
+
+    pool = TokenPool(["token-a", "token-b"], reserve=0)
+    assert pool.reserve == 0
+    scheduler = FetchScheduler(FakeClient(), pool)
+    asyncio.run(scheduler.open_stream("GET", "https://api.github.com/repos/o/r/tarball/main", {}))
+
+    token = sent[0].split(" ", 1)[1]
+    assert token in ("token-a", "token-b")
+    assert {state.token: state.remaining for state in pool._states}[token] == 7
@@ -0,0 +1,92 @@
+import os
+import time
+import uuid
+import asyncio
+import pytest
+from settings import AsyncDatabase
+from services.db.repo_manager import AsyncRepoManager, RepoIdentityMap
+from services.db.federation_graph_manager import AsyncFederationGraphManager
+from services.db.proposal_manager import AsyncProposalManager
+
+pytestmark = pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="DATABASE_URL not set")
+
+
+def run(test):
+    async def main():
+        db = AsyncDatabase(min_size=1, max_size=4)
+        try:
+            await test(db)
+        finally:
+            await db.close_all()
+    asyncio.run(main())
+
+
+def test_connection_commits_on_exit_and_rolls_back_on_error():
+    async def test(db):
+        logical_repo_id = f"test/{uuid.uuid4().hex}"
+        with pytest.raises(RuntimeError):
+            async with db.connection() as conn:
+                await conn.execute("INSERT INTO federation_repo (repo_id) VALUES (%s)", (logical_repo_id,))
+                raise RuntimeError("boom")
+
+        async with db.connection() as conn:
+            cur = await conn.execute("SELECT COUNT(*) FROM federation_repo WHERE repo_id = %s", (logical_repo_id,))
+            assert (await cur.fetchone())[0] == 0
+    run(test)
+
+
+def test_repo_graph_and_proposal_round_trip():
+    async def test(db):
+        repos = AsyncRepoManager(db, identity_map=RepoIdentityMap(100), read_db=db)
+        graph = AsyncFederationGraphManager(db, read_db=db)
+        logical_repo_id = f"test/{uuid.uuid4().hex}"
+
+        async with db.connection() as conn:
+            async with conn.cursor() as cur:
+                repo_pk = await repos.save_repo_tx(cur, logical_repo_id, "main", "abc")
+
+        assert await repos.resolve_repo_pk(logical_repo_id) == repo_pk
+        assert await repos.resolve_repo_id_by_pk(repo_pk) == logical_repo_id
+
+        # Re-saving and re-linking are idempotent against the migration 3 unique indexes
+        async with db.connection() as conn:
+            async with conn.cursor() as cur:
+                assert await repos.save_repo_tx(cur, logical_repo_id, "dev", "def") == repo_pk
+
+        for index in range(5):
+            await graph.insert_graph_link(logical_repo_id, f"pkg/m{index}.py", "file", f"f{index}", None, 1.0, None)
+            await graph.insert_graph_link(logical_repo_id, f"pkg/m{index}.py", "file", f"f{index}", None, 1.0, None)
+        first = await graph.query_graph_page(repo_pk, limit=3)
+        second = await graph.query_graph_page(repo_pk, limit=3, after_id=first["next_after_id"])
+        assert [node["name"] for node in first["nodes"] + second["nodes"]] == [f"f{index}" for index in range(5)]
+        assert second["next_after_id"] is None
+
+        await AsyncProposalManager(db).save_proposal({
+            "proposal_id": str(uuid.uuid4()), "repo_id": repo_pk, "branch": "main", "proposed_by": "test",
+            "commit_message": "m", "patches": [], "status": "pending"
+        })
+
+        async with db.connection() as conn:
+            await conn.execute("DELETE FROM patch_proposal WHERE repo_id = %s", (repo_pk,))
+            await conn.execute("DELETE FROM federation_graph WHERE repo_id = %s", (repo_pk,))
+            await conn.execute("DELETE FROM federation_repo WHERE id = %s", (repo_pk,))
+    run(test)
+
+
+def test_slow_query_does_not_block_the_event_loop():
+    async def test(db):
+        async def slow_query():
+            async with db.connection() as conn:
+                await conn.execute("SELECT pg_sleep(0.5)")
+
+        ticks = []
+
+        async def ticker():
+            started = time.monotonic()
+            while time.monotonic() - started < 0.4:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.05)
+
+        await asyncio.gather(slow_query(), ticker())
+        assert len(ticks) >= 5
+    run(test)
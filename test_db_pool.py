@@ -0,0 +1,82 @@
+import os
+import pytest
+import threading
+from settings import Database, PoolTimeout, ReplicaHealth, pool_budget
+
+requires_db = pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="DATABASE_URL not set")
+
+
+def test_pool_budget_splits_db_pool_max(monkeypatch):
+    monkeypatch.delenv("DB_POOL_SYNC_MAX", raising=False)
+    monkeypatch.delenv("DB_POOL_ASYNC_MAX", raising=False)
+    monkeypatch.setenv("DB_POOL_MAX", "9")
+    assert pool_budget("sync") + pool_budget("async") == 9
+
+    monkeypatch.setenv("DB_POOL_ASYNC_MAX", "2")
+    assert pool_budget("async") == 2
+
+
+def test_replica_health_counts_concurrent_reads():
+    health = ReplicaHealth("replica-1", max_lag=5, check_interval=10, retry_after=30)
+
+    def worker():
+        for _ in range(10000):
+            health.record_read()
+            health.usable(100.0)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert health.snapshot()["reads"] == 80000
+
+    assert not health.record_lag(12, now=100.0)
+    assert not health.usable(105.0) and health.usable(110.0)
+    health.mark_unavailable("down", now=110.0)
+    assert not health.usable(139.0)
+
+@requires_db
+def test_checkout_times_out_when_exhausted_and_recovers():
+    db = Database(minconn=1, maxconn=2, checkout_timeout=0.2)
+    try:
+        first, second = db.get_connection(), db.get_connection()
+        with pytest.raises(PoolTimeout):
+            db.get_connection()
+        db.release_connection(first)
+        third = db.get_connection()
+        db.release_connection(second)
+        db.release_connection(third)
+        metrics = db.metrics()
+        assert metrics["in_use"] == 0 and metrics["timeouts"] == 1
+    finally:
+        db.close_all()
+
+
+@requires_db
+def test_release_returns_connection_when_rollback_fails():
+    db = Database(minconn=1, maxconn=2, checkout_timeout=1)
+    try:
+        for _ in range(4):
+            conn = db.get_connection()
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_backend_pid()")
+                pid = cur.fetchone()[0]
+            # Kill the backend mid-transaction so the rollback on release hits a dead socket
+            killer = db.get_connection()
+            with killer.cursor() as cur:
+                cur.execute("SELECT pg_terminate_backend(%s)", (pid,))
+            killer.commit()
+            db.release_connection(killer)
+            db.release_connection(conn)
+
+        # The pool and the slot semaphore still agree: both slots can be checked out again
+        conns = [db.get_connection(), db.get_connection()]
+        for conn in conns:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+                assert cur.fetchone() == (1,)
+            db.release_connection(conn)
+        assert db.metrics()["in_use"] == 0
+    finally:
+        db.close_all()
@@ -0,0 +1,97 @@
+import time
+import random
+from services.dependency_graph import DependencyIndex, DependencyResolver
+
+
+def test_topological_order_puts_dependencies_first():
+    index = DependencyIndex([("app.py", "models.py"), ("models.py", "db.py"), ("app.py", "db.py")])
+    assert index.topological_order(["app.py", "db.py", "models.py", "README.md"]) == (
+        ["README.md", "db.py", "models.py", "app.py"], []
+    )
+
+
+def test_only_cycle_members_are_cyclic():
+    # a -> b <-> c, d -> a: the b/c cycle is one block ahead of a, and a is not on a cycle
+    index = DependencyIndex([("a", "b"), ("b", "c"), ("c", "b"), ("d", "a")])
+    assert index.topological_order(["a", "b", "c", "d"]) == (["b", "c", "a", "d"], ["b", "c"])
+
+
+def test_order_is_restricted_to_the_given_files():
+    index = DependencyIndex([("a", "b"), ("b", "c"), ("c", "a"), ("d", "a")])
+    # Without c the a/b cycle is broken, so nothing is cyclic
+    assert index.topological_order(["d", "b", "a"]) == (["b", "a", "d"], [])
+
+
+def test_closures_follow_edges_both_ways():
+    index = DependencyIndex([("a", "b"), ("b", "c"), ("d", "c")])
+    assert sorted(index.closure(["a"])) == ["a", "b", "c"]
+    assert sorted(index.reverse_closure(["c"])) == ["a", "b", "c", "d"]
+    assert index.closure(["unknown.py"]) == ["unknown.py"]
+    assert index.dependencies("a") == ["b"] and sorted(index.dependents("c")) == ["b", "d"]
+
+
+def test_large_cycles_and_graphs_stay_linear():
+    ring = [f"m{index}.py" for index in range(8000)]
+    index = DependencyIndex(zip(ring, ring[1:] + ring[:1]))
+    ordered, cyclic = index.topological_order(ring)
+    assert sorted(ordered) == sorted(ring) and len(cyclic) == 8000
+
+    rng = random.Random(7)
+    files = [f"f{index}.py" for index in range(100000)]
+    index = DependencyIndex((rng.choice(files), rng.choice(files)) for _ in range(300000))
+    started = time.monotonic()
+    ordered, cyclic = index.topological_order(files)
+    assert len(ordered) == len(files) and len(set(ordered)) == len(files)
+    assert time.monotonic() - started < 10
+
+    # Every edge between different components points backwards in the order
+    position = {path: place for place, path in enumerate(ordered)}
+    cyclic = set(cyclic)
+    for source in files[:2000]:
+        for target in index.dependencies(source):
+            assert position[target] < position[source] or (source in cyclic and target in cyclic)
+
+
+def edges(resolver, file_path, nodes):
+    return sorted(resolver.file_edges(file_path, nodes))
+
+
+def node(node_type, name, qualname=None, calls=(), inherits_from=None):
+    return {"node_type": node_type, "name": name, "qualname": qualname or name, "calls": calls, "inherits_from": inherits_from}
+
+
+def test_external_imports_do_not_land_on_same_named_repo_files():
+    resolver = DependencyResolver(["src/pkg/__init__.py", "src/pkg/json.py", "routes/github.py", "main.py"])
+    assert resolver.resolve("json") is None
+    assert resolver.resolve("github") is None
+    assert resolver.resolve("pkg.json.dumps") == ("src/pkg/json.py", "dumps")
+    assert resolver.resolve("routes.github") == ("routes/github.py", "")
+
+    nodes = [node("import", "json"), node("function", "f", calls=("json.dumps",))]
+    assert edges(resolver, "main.py", nodes) == []
+
+
+def test_relative_imports_resolve_against_the_importing_package():
+    resolver = DependencyResolver(["pkg/__init__.py", "pkg/a.py", "pkg/b.py", "c.py"])
+    assert resolver._absolute("pkg/a.py", ".b") == "pkg.b"
+    assert resolver._absolute("pkg/__init__.py", ".a") == "pkg.a"
+    assert resolver._absolute("pkg/a.py", "..c") == "c"
+    assert resolver._absolute("pkg/a.py", "...c") is None
+
+
+def test_file_edges_cover_imports_calls_and_inheritance():
+    resolver = DependencyResolver(["app.py", "models.py"])
+    nodes = [
+        node("import", "models.Base", qualname="Base"),
+        node("import", "models"),
+        node("class", "User", inherits_from="{Base}"),
+        node("function", "save", qualname="User.save", calls=("self.validate", "models.flush", "print")),
+        node("function", "validate", qualname="User.validate")
+    ]
+    assert edges(resolver, "app.py", nodes) == [
+        ("", "models.py", "", "import"),
+        ("", "models.py", "Base", "import"),
+        ("User", "models.py", "Base", "inherits"),
+        ("User.save", "app.py", "User.validate", "call"),
+        ("User.save", "models.py", "flush", "call")
+    ]
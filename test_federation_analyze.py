@@ -0,0 +1,104 @@
+import os
+import uuid
+import hashlib
+import pytest
+from services.federation_service import FederationService
+from services.parsing_engine import ParsingEngine
+from services.db.semantic_manager import SemanticManager
+from services.db.dependency_manager import DependencyManager
+from services.db.repo_manager import RepoManager
+
+pytestmark = pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="DATABASE_URL not set")
+
+
+def blob(content):
+    data = content.encode()
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class FakeGitHub:
+    def __init__(self, contents):
+        self.blobs = {blob(content): content.encode() for content in contents}
+
+    def get_blobs(self, shas):
+        return {sha: self.blobs[sha] for sha in shas if sha in self.blobs}
+
+
+@pytest.fixture
+def service():
+    from settings import get_database
+    db = get_database()
+    service = FederationService.__new__(FederationService)
+    service.semantic_manager = SemanticManager(db)
+    service.dependency_manager = DependencyManager(db, read_db=db)
+    service.parsing_engine = ParsingEngine(max_workers=1, cache=False)
+
+    conn = db.get_connection()
+    try:
+        with conn.cursor() as cur:
+            service.repo_pk = RepoManager(db).save_repo_tx(cur, f"test/{uuid.uuid4().hex}", "main", "abc")
+        conn.commit()
+    finally:
+        db.release_connection(conn)
+    yield service
+
+    conn = db.get_connection()
+    try:
+        with conn.cursor() as cur:
+            for table in ("federation_edge", "federation_edge_state", "semantic_node", "semantic_file"):
+                cur.execute(f"DELETE FROM {table} WHERE repo_id = %s", (service.repo_pk,))
+            cur.execute("DELETE FROM federation_repo WHERE id = %s", (service.repo_pk,))
+        conn.commit()
+    finally:
+        db.release_connection(conn)
+
+
+def files(contents):
+    return [(path, blob(content), content) for path, content in contents.items()]
+
+
+def test_result_is_capped_and_counts_every_node(service):
+    contents = {f"pkg/m{index}.py": f"def f{index}():\n    pass\n\ndef g{index}():\n    pass\n" for index in range(10)}
+    result = service._analyze_files(service.repo_pk, files(contents), {}, sample_size=5)
+
+    assert result["node_count"] == 20
+    assert len(result["semantic_nodes"]) == 5
+    assert result["files"] == {"analyzed": 10, "unchanged": 0, "removed": 0}
+
+
+def test_shas_are_rechecked_under_the_lock(service):
+    old = {"a.py": "A = 1\n", "b.py": "B = 1\n"}
+    service._analyze_files(service.repo_pk, files(old), {})
+    stale_snapshot = service.semantic_manager.get_file_shas(service.repo_pk)
+
+    # Another run stores a newer b.py between our snapshot and our lock
+    new = {"a.py": "A = 1\n", "b.py": "def b():\n    pass\n"}
+    service._analyze_files(service.repo_pk, files(new), stale_snapshot)
+
+    # Our run still sees the old b.py as its target: it was skipped against the snapshot,
+    # so it must be re-parsed under the lock instead of being left at the other run's SHA
+    service.github = FakeGitHub(old.values())
+    result = service._analyze_files(service.repo_pk, [(path, blob(content), None) for path, content in old.items()], stale_snapshot)
+
+    assert result["files"] == {"analyzed": 1, "unchanged": 1, "removed": 0}
+    assert service.semantic_manager.get_file_shas(service.repo_pk) == {path: blob(content) for path, content in old.items()}
+
+
+def test_edges_skip_relative_imports_above_the_root(service, monkeypatch):
+    from services.db import dependency_manager
+    contents = {
+        "pkg/__init__.py": "",
+        "pkg/a.py": "from . import b\nfrom ... import c\n\ndef f():\n    b.g()\n",
+        "pkg/b.py": "def g():\n    pass\n",
+        "c.py": "X = 1\n"
+    }
+    service._analyze_files(service.repo_pk, files(contents), {})
+
+    edges = {(edge["source_path"], edge["target_path"], edge["edge_type"]) for edge in service.dependency_manager.get_edges(service.repo_pk)}
+    assert edges == {("pkg/a.py", "pkg/b.py", "import"), ("pkg/a.py", "pkg/b.py", "call")}
+
+    # The shared index cache keeps only the most recently used repos
+    monkeypatch.setattr(service.dependency_manager, "cache_size", 1)
+    monkeypatch.setattr(dependency_manager, "_indexes", dependency_manager.OrderedDict({-1: (None, None)}))
+    assert service.dependency_manager.get_index(service.repo_pk).closure(["pkg/a.py"]) == ["pkg/a.py", "pkg/b.py"]
+    assert list(dependency_manager._indexes) == [service.repo_pk]
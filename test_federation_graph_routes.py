@@ -0,0 +1,25 @@
+import os
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+pytestmark = pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="DATABASE_URL not set")
+
+
+def test_query_pages_through_the_graph(monkeypatch):
+    from routes import federation_graph
+    rows = [{"id": node_id, "name": f"n{node_id}"} for node_id in range(1, 6)]
+
+    async def query_graph(repo, columns=None, node_type=None, path_prefix=None, after_id=None, limit=None):
+        return [row for row in rows if row["id"] > (after_id or 0)][:limit]
+
+    monkeypatch.setattr(federation_graph.manager, "query_graph", query_graph)
+    app = FastAPI()
+    app.include_router(federation_graph.router)
+    client = TestClient(app)
+
+    first = client.get("/federation/graph/query", params={"repo_id": 1, "limit": 3}).json()
+    assert [row["id"] for row in first["items"]] == [1, 2, 3] and first["next_after_id"] == 3
+
+    second = client.get("/federation/graph/query", params={"repo_id": 1, "limit": 3, "after_id": 3}).json()
+    assert [row["id"] for row in second["items"]] == [4, 5] and second["next_after_id"] is None
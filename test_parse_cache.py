@@ -0,0 +1,71 @@
+import os
+import time
+from services.parse_cache import ParseCache
+from services.blob_store import BlobStore
+from utils.helpers import calculate_blob_sha
+
+
+def make_version(base, name, age):
+    shard = base / name / "ab"
+    shard.mkdir(parents=True)
+    (shard / "cdef").write_bytes(b"x")
+    past = time.time() - age
+    for path in (shard / "cdef", shard, base / name):
+        os.utime(path, (past, past))
+
+
+def test_only_old_version_directories_are_dropped(tmp_path):
+    make_version(tmp_path, "0123456789ab", age=7200)
+    make_version(tmp_path, "ba9876543210", age=60)
+    make_version(tmp_path, "not-a-version", age=7200)
+    (tmp_path / "fedcba987654.txt").write_text("keep")
+
+    cache = ParseCache(root=str(tmp_path), version="aaaaaaaaaaaa", stale_after=3600)
+
+    assert sorted(os.listdir(tmp_path)) == ["aaaaaaaaaaaa", "ba9876543210", "fedcba987654.txt", "not-a-version"]
+    cache.put("ab" * 20, [("function", "f")])
+    assert cache.get("ab" * 20) == [("function", "f")]
+    assert cache.get("cd" * 20) is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+
+def test_stores_evict_least_recently_used_and_reload_index(tmp_path):
+    blobs = [bytes([index]) * 100 for index in range(3)]
+    shas = [calculate_blob_sha(blob) for blob in blobs]
+    store = BlobStore(root=str(tmp_path), max_bytes=250)
+    for index, (sha, blob) in enumerate(zip(shas, blobs)):
+        store.put(sha, blob)
+        os.utime(store._path(sha), (1000 + index, 1000 + index))
+        store._index[sha] = (100, 1000 + index)
+        if index == 1:
+            # Reading the first blob makes the second the least recently used
+            assert store.get(shas[0]) == blobs[0]
+
+    assert store.get(shas[1]) is None
+    assert store.get(shas[0]) == blobs[0] and store.get(shas[2]) == blobs[2]
+    assert BlobStore(root=str(tmp_path), max_bytes=250).stats()["blobs"] == 2
+
+
+def test_read_only_version_directories_are_kept(tmp_path):
+    make_version(tmp_path, "0123456789ab", age=7200)
+    # A live process on that version keeps hitting the entry, which refreshes its mtime
+    os.utime(tmp_path / "0123456789ab" / "ab" / "cdef")
+
+    ParseCache(root=str(tmp_path), version="aaaaaaaaaaaa", stale_after=3600)
+    assert "0123456789ab" in os.listdir(tmp_path)
+
+
+def test_concurrent_writers_of_one_key_never_fail(tmp_path):
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(4) as pool:
+        results = list(pool.map(_write_same_key, [str(tmp_path)] * 16))
+    assert results == [[("node",)]] * 16
+    assert not [name for name in os.listdir(tmp_path / "aaaaaaaaaaaa" / "ab") if name.endswith(".tmp")]
+
+
+def _write_same_key(root):
+    cache = ParseCache(root=root, version="aaaaaaaaaaaa")
+    for _ in range(50):
+        cache._index.pop("ab" * 20, None)
+        cache.put("ab" * 20, [("node",)])
+    return ParseCache(root=root, version="aaaaaaaaaaaa").get("ab" * 20)
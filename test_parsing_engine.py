@@ -0,0 +1,88 @@
+import time
+import threading
+import pytest
+from services.parsing_engine import ParsingEngine
+from services.semantic_parser import SemanticParser
+
+
+class DictCache:
+    def __init__(self, entries=None):
+        self.entries = dict(entries or {})
+
+    def get(self, sha):
+        return self.entries.get(sha)
+
+    def put(self, sha, nodes):
+        self.entries[sha] = nodes
+
+
+def source(index):
+    return f"def f{index}():\n    return g{index}()\n"
+
+
+def files(count, pulled=None):
+    for index in range(count):
+        if pulled is not None:
+            pulled.append(index)
+        yield f"m{index}.py", f"sha{index}", source(index)
+
+
+@pytest.fixture
+def engine_factory():
+    engines = []
+
+    def make(cache, **kwargs):
+        engine = ParsingEngine(max_workers=2, chunk_size=2, cache=cache, **kwargs)
+        engines.append(engine)
+        return engine
+    yield make
+    for engine in engines:
+        engine.close()
+
+
+def feeders():
+    return [thread for thread in threading.enumerate() if thread.name == "parse-feeder"]
+
+
+def test_cache_hits_and_parsed_chunks_are_all_returned(engine_factory):
+    parser = SemanticParser()
+    cache = DictCache({f"sha{index}": parser.parse_compact(source(index)) for index in range(0, 20, 3)})
+    engine = engine_factory(cache)
+
+    results = {file_path: (blob_sha, nodes) for file_path, blob_sha, nodes in engine.parse_stream(files(20))}
+
+    assert sorted(results) == sorted(f"m{index}.py" for index in range(20))
+    for index in range(20):
+        blob_sha, nodes = results[f"m{index}.py"]
+        assert blob_sha == f"sha{index}"
+        assert [(node.name, node.calls) for node in nodes] == [(f"f{index}", (f"g{index}",))]
+    assert len(cache.entries) == 20
+
+
+def test_input_errors_reach_the_caller(engine_factory):
+    def broken():
+        yield from files(5)
+        raise ConnectionError("fetch failed")
+
+    with pytest.raises(ConnectionError):
+        list(engine_factory(DictCache()).parse_stream(broken()))
+    assert not feeders()
+
+
+def test_slow_consumer_bounds_work_in_flight_and_close_stops_the_feeder(engine_factory):
+    parser = SemanticParser()
+    # All hits: nothing waits on a worker, so only the slots hold the feeder back
+    cache = DictCache({f"sha{index}": parser.parse_compact(source(index)) for index in range(1000)})
+    engine = engine_factory(cache, max_in_flight=3)
+    pulled = []
+
+    stream = engine.parse_stream(files(1000, pulled))
+    next(stream)
+    time.sleep(0.3)
+    assert len(pulled) <= 3 + 2
+
+    started = time.monotonic()
+    stream.close()
+    assert time.monotonic() - started < 2
+    assert not feeders()
+    assert len(pulled) < 1000
@@ -0,0 +1,48 @@
+import os
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+pytestmark = pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="DATABASE_URL not set")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from routes import replication
+
+    async def resolve(repo_pk):
+        return f"owner/repo{repo_pk}"
+
+    def build_plan(**kwargs):
+        raise ValueError("Seeds match no analyzed file: ['nope.py']")
+
+    def execute_replication(plan):
+        raise RuntimeError("GitHub unavailable")
+
+    monkeypatch.setattr(replication.repo_manager, "resolve_repo_id_by_pk", resolve)
+    monkeypatch.setattr(replication.planner, "build_plan", build_plan)
+    monkeypatch.setattr(replication.executor, "execute_replication", execute_replication)
+    app = FastAPI()
+    app.include_router(replication.router)
+    return TestClient(app), monkeypatch, replication
+
+
+def test_unmatched_seeds_are_a_client_error(client):
+    client, _, _ = client
+    payload = {"source_repo_id": 1, "target_repo_id": 2, "commit_message": "m", "target_branch": "main", "seeds": ["nope.py"]}
+
+    response = client.post("/replication/plan", json=payload)
+    assert response.status_code == 400 and "nope.py" in response.json()["detail"]
+
+    response = client.post("/replication/execute", json=payload)
+    assert response.status_code == 400 and "nope.py" in response.json()["detail"]
+
+
+def test_execution_failures_stay_server_errors(client):
+    client, monkeypatch, replication = client
+    monkeypatch.setattr(replication.planner, "build_plan", lambda **kwargs: {"modules": []})
+
+    response = client.post("/replication/execute", json={
+        "source_repo_id": 1, "target_repo_id": 2, "commit_message": "m", "target_branch": "main"
+    })
+    assert response.status_code == 500 and "GitHub unavailable" in response.json()["detail"]
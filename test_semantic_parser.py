@@ -0,0 +1,74 @@
+from services.semantic_parser import SemanticParser
+
+SOURCE = '''
+import os.path
+import numpy as np
+from . import sibling
+from ..pkg import mod as alias
+from services.db import repo_manager
+
+@router.get("/items", response_model=compute())
+async def list_items(limit: int = helper(), *, page=other()):
+    """List items."""
+    return await fetch(limit)
+
+@dataclass(frozen=True)
+class Service(Base, mixins.Logged, metaclass=Meta):
+    @staticmethod
+    def build():
+        return Service()
+
+    async def run(self):
+        def inner():
+            return self.step()
+        return inner()
+
+    def step(self):
+        return os.path.join("a", "b")
+'''
+
+
+def parse():
+    return {node["qualname"]: node for node in SemanticParser().parse_python_file(SOURCE)}
+
+
+def test_definitions_have_qualnames_and_no_duplicates():
+    nodes = SemanticParser().parse_python_file(SOURCE)
+    definitions = [node["qualname"] for node in nodes if node["node_type"] != "import"]
+    assert definitions == ["list_items", "Service", "Service.build", "Service.run", "Service.run.inner", "Service.step"]
+
+    by_name = parse()
+    assert by_name["Service"]["methods"] == ("build", "run", "step")
+    assert by_name["Service"]["inherits_from"] == ("Base", "mixins.Logged")
+    assert by_name["Service.build"]["node_type"] == "method"
+    assert by_name["Service.run.inner"]["node_type"] == "function"
+
+
+def test_async_functions_and_arguments():
+    by_name = parse()
+    assert by_name["list_items"]["is_async"] and by_name["Service.run"]["is_async"]
+    assert not by_name["Service.step"]["is_async"]
+    assert by_name["list_items"]["args"] == ("limit", "page")
+    assert by_name["list_items"]["docstring"] == "List items."
+
+
+def test_imports_record_target_and_bound_name():
+    imports = [(node["name"], node["qualname"]) for node in SemanticParser().parse_python_file(SOURCE) if node["node_type"] == "import"]
+    assert imports == [
+        ("os.path", "os"), ("numpy", "np"), (".sibling", "sibling"), ("..pkg.mod", "alias"),
+        ("services.db.repo_manager", "repo_manager")
+    ]
+
+
+def test_decorator_calls_are_named_and_not_attributed_to_the_body():
+    by_name = parse()
+    assert by_name["list_items"]["decorators"] == ("router.get",)
+    assert by_name["Service"]["decorators"] == ("dataclass",)
+    assert by_name["Service.build"]["decorators"] == ("staticmethod",)
+
+    # Decorator and default-argument calls run at definition time, outside the function body
+    assert by_name["list_items"]["calls"] == ("fetch",)
+    assert by_name["Service.build"]["calls"] == ("Service",)
+    assert by_name["Service.run"]["calls"] == ("inner",)
+    assert by_name["Service.run.inner"]["calls"] == ("self.step",)
+    assert by_name["Service.step"]["calls"] == ("os.path.join",)
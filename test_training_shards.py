@@ -0,0 +1,34 @@
+import os
+import gzip
+import json
+import pytest
+from services.training.training_payload_generator import TrainingPayloadGenerator
+
+
+def read_shards(paths):
+    return [json.loads(line) for path in paths for line in gzip.open(path, "rt", encoding="utf-8")]
+
+
+def test_failed_or_empty_export_keeps_previous_shards(tmp_path):
+    generator = TrainingPayloadGenerator()
+    first = generator.save_to_jsonl_shards(({"n": n} for n in range(5)), str(tmp_path), shard_size=2)
+    assert len(first["shards"]) == 3
+
+    def failing():
+        yield {"n": 100}
+        yield {"n": 101}
+        yield {"n": 102}
+        raise RuntimeError("source went away")
+
+    with pytest.raises(RuntimeError):
+        generator.save_to_jsonl_shards(failing(), str(tmp_path), shard_size=2)
+    assert read_shards(first["shards"]) == [{"n": n} for n in range(5)]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+    assert generator.save_to_jsonl_shards(iter(()), str(tmp_path), shard_size=2)["shards"] == []
+    assert read_shards(first["shards"]) == [{"n": n} for n in range(5)]
+
+    # A smaller successful export replaces the set and drops the leftover shard
+    second = generator.save_to_jsonl_shards(({"n": n} for n in range(3)), str(tmp_path), shard_size=2)
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(path) for path in second["shards"])
+    assert read_shards(second["shards"]) == [{"n": n} for n in range(3)]
@@ -13,6 +13,11 @@ def calculate_sha(content: str) -> str:
     """
     Generate SHA-1 hash of file content as Git uses for blob SHA.
     """
-    header = f"blob {len(content)}\0".encode("utf-8")
-    store = header + content.encode("utf-8")
-    return hashlib.sha1(store).hexdigest()
+    return calculate_blob_sha(content.encode("utf-8"))
+
+def calculate_blob_sha(data: bytes) -> str:
+    """
+    Git blob SHA of raw bytes (the header length is the byte length, not the character count).
+    """
+    header = f"blob {len(data)}\0".encode("utf-8")
+    return hashlib.sha1(header + data).hexdigest()